@@ -0,0 +1,124 @@
+import hashlib
+import os
+import re
+import tempfile
+import time
+from app.core.cache import get_cache_path
+
+ARTIFACT_ID_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+MEDIA_TYPES = {
+    "mp3": "audio/mpeg",
+    "vtt": "text/vtt",
+}
+
+
+class ArtifactStore:
+    """
+    Finished podcast files on local disk, named by the SHA-256 of the SSML they
+    were synthesized from, so the same script is only ever synthesized once.
+    Files are written atomically and never modified afterwards.
+
+    With `max_bytes` set the store is bounded like SQLiteCache: every
+    EVICTION_INTERVAL writes, the least recently used artifacts (all of their
+    files together) are deleted until the total fits. Use is tracked in the
+    access time, which `touch` sets explicitly; the modification time stays
+    the write time, so Last-Modified headers do not change.
+    """
+    EVICTION_INTERVAL = 50  # check the size bound every N writes
+
+    def __init__(self, root: str | None = None, max_bytes: int | None = None):
+        self.root = root or os.getenv("ARTIFACTS_DIR") or get_cache_path("artifacts")
+        self.max_bytes = max_bytes
+        # Starts at the interval so the first write of a process checks the bound
+        self._writes = self.EVICTION_INTERVAL - 1
+        os.makedirs(self.root, exist_ok=True)
+
+    @staticmethod
+    def artifact_id(ssml: str) -> str:
+        return hashlib.sha256(ssml.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def is_valid_id(artifact_id: str) -> bool:
+        return bool(ARTIFACT_ID_PATTERN.match(artifact_id))
+
+    def relative_path(self, artifact_id: str, kind: str) -> str:
+        # Two-level fan-out keeps directories small
+        return f"{artifact_id[:2]}/{artifact_id}.{kind}"
+
+    def path(self, artifact_id: str, kind: str) -> str:
+        return os.path.join(self.root, self.relative_path(artifact_id, kind))
+
+    def exists(self, artifact_id: str, kind: str) -> bool:
+        return os.path.exists(self.path(artifact_id, kind))
+
+    def touch(self, artifact_id: str, kind: str):
+        """Marks an artifact as used, so eviction keeps it longer."""
+        path = self.path(artifact_id, kind)
+        try:
+            os.utime(path, (time.time(), os.stat(path).st_mtime))
+        except FileNotFoundError:
+            pass
+
+    def write(self, artifact_id: str, kind: str, data: bytes | str) -> str:
+        """Writes an artifact atomically and returns its path."""
+        path = self.path(artifact_id, kind)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                tmp_file.write(data)
+            # mkstemp creates 0600 files; nginx serves them as another user
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._writes += 1
+        if self.max_bytes is not None and self._writes % self.EVICTION_INTERVAL == 0:
+            self._evict()
+        return path
+
+    def _evict(self):
+        # artifact id -> [last use, total size, paths]
+        artifacts: dict[str, list] = {}
+        total = 0
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                if filename.endswith(".tmp"):
+                    continue
+                path = os.path.join(directory, filename)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                artifact = artifacts.setdefault(filename.split(".", 1)[0], [0.0, 0, []])
+                artifact[0] = max(artifact[0], stat.st_atime, stat.st_mtime)
+                artifact[1] += stat.st_size
+                artifact[2].append(path)
+                total += stat.st_size
+        if total <= self.max_bytes:  # type: ignore
+            return
+        excess = total - self.max_bytes  # type: ignore
+        evicted = 0
+        for _, size, paths in sorted(artifacts.values(), key=lambda artifact: artifact[0]):
+            for path in paths:
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+            evicted += 1
+            excess -= size
+            if excess <= 0:
+                break
+        print(f"Evicted {evicted} artifacts from {self.root}")
+
+    def read_bytes(self, artifact_id: str, kind: str) -> bytes:
+        with open(self.path(artifact_id, kind), "rb") as artifact_file:
+            return artifact_file.read()
+
+    def read_text(self, artifact_id: str, kind: str) -> str:
+        with open(self.path(artifact_id, kind), encoding="utf-8") as artifact_file:
+            return artifact_file.read()
@@ -0,0 +1,176 @@
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+
+# Every worker process opens the same SQLite file, so cached data is shared
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), "gitpodcast")
+
+_connections: dict[str, tuple[sqlite3.Connection, threading.RLock]] = {}
+_connections_lock = threading.Lock()
+_caches: dict[str, "SQLiteCache"] = {}
+
+
+def get_cache_path(filename: str) -> str:
+    """
+    Returns a path inside the cache directory, creating the directory if needed.
+    CACHE_DIR is read on every call rather than at import, so a value loaded
+    from .env later still applies; an empty value means the default.
+    """
+    cache_dir = os.getenv("CACHE_DIR") or DEFAULT_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    return os.path.join(cache_dir, filename)
+
+
+def get_connection(path: str) -> tuple[sqlite3.Connection, threading.RLock]:
+    """One connection per database file and process, guarded by a lock since
+    it is used both from the event loop and from worker threads."""
+    with _connections_lock:
+        if path not in _connections:
+            conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS cache_stats (
+                    cache TEXT NOT NULL,
+                    event TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (cache, event)
+                )
+            """)
+            _connections[path] = (conn, threading.RLock())
+        return _connections[path]
+
+
+class SQLiteCache:
+    """
+    Byte-valued cache stored in a SQLite table that all uvicorn workers share.
+    Entries expire `ttl` seconds after they were written (if set), and the total
+    size is bounded; the least recently used entries are evicted first.
+    Event counters live in the same database so stats cover every worker.
+    """
+    EVICTION_INTERVAL = 50  # check the size bound every N writes
+    # Hits refresh used_at at most this often, so most reads never take the write lock
+    TOUCH_INTERVAL = 60
+
+    def __init__(self, name: str, max_bytes: int, ttl: float | None = None, path: str | None = None):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.path = path or get_cache_path("cache.db")
+        self._writes = 0
+        self._conn, self._lock = get_connection(self.path)
+        with self._lock:
+            self._conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS "{name}" (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    size INTEGER NOT NULL,
+                    created_at REAL NOT NULL,
+                    used_at REAL NOT NULL
+                )
+            """)
+        _caches[name] = self
+
+    def get(self, key: str) -> bytes | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f'SELECT value, created_at, used_at FROM "{self.name}" WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                return None
+            if self.ttl is not None and row[1] < now - self.ttl:
+                self._conn.execute(f'DELETE FROM "{self.name}" WHERE key = ?', (key,))
+                self.record("expirations")
+                return None
+            if row[2] < now - self.TOUCH_INTERVAL:
+                self._conn.execute(f'UPDATE "{self.name}" SET used_at = ? WHERE key = ?', (now, key))
+            return row[0]
+
+    def set(self, key: str, value: bytes):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                f'INSERT OR REPLACE INTO "{self.name}" (key, value, size, created_at, used_at) VALUES (?, ?, ?, ?, ?)',
+                (key, value, len(value), now, now)
+            )
+            self._writes += 1
+            if self._writes % self.EVICTION_INTERVAL == 0:
+                self._evict()
+
+    def get_json(self, key: str):
+        value = self.get(key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, key: str, value):
+        self.set(key, json.dumps(value).encode("utf-8"))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute(f'DELETE FROM "{self.name}" WHERE key = ?', (key,))
+
+    def _evict(self):
+        if self.ttl is not None:
+            expired = self._conn.execute(f'DELETE FROM "{self.name}" WHERE created_at < ?', (time.time() - self.ttl,)).rowcount
+            if expired:
+                self.record("expirations", expired)
+        total = self._conn.execute(f'SELECT COALESCE(SUM(size), 0) FROM "{self.name}"').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        victims = []
+        for key, size in self._conn.execute(f'SELECT key, size FROM "{self.name}" ORDER BY used_at'):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        self._conn.executemany(f'DELETE FROM "{self.name}" WHERE key = ?', victims)
+        self.record("evictions", len(victims))
+
+    def record(self, event: str, count: int = 1):
+        """Adds to one of this cache's event counters."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO cache_stats (cache, event, count) VALUES (?, ?, ?) "
+                "ON CONFLICT (cache, event) DO UPDATE SET count = count + excluded.count",
+                (self.name, event, count)
+            )
+
+    def stats(self) -> dict:
+        """Event counters plus current entry count and size, across all workers."""
+        with self._lock:
+            stats = dict(self._conn.execute("SELECT event, count FROM cache_stats WHERE cache = ?", (self.name,)).fetchall())
+            entries, size = self._conn.execute(f'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM "{self.name}"').fetchone()
+        stats.update({"entries": entries, "bytes": size})
+        lookups = stats.get("hits", 0) + stats.get("misses", 0)
+        if lookups:
+            stats["hit_rate"] = round(stats.get("hits", 0) / lookups, 4)
+        return stats
+
+
+def get_cache_stats() -> dict:
+    """Stats of every cache created in this process, keyed by cache name."""
+    return {name: cache.stats() for name, cache in _caches.items()}
+
+
+class HttpResponseCache(SQLiteCache):
+    """
+    Stores HTTP response bodies together with their ETag / Last-Modified
+    validators so later requests can be revalidated with a conditional GET.
+    """
+
+    def __init__(self, name: str = "http_responses", max_bytes: int = 256 * 1024 * 1024, path: str | None = None):
+        super().__init__(name, max_bytes, path=path)
+
+    def lookup(self, key: str) -> tuple[dict, bytes] | None:
+        """Returns (validators and headers, body) for a cached response."""
+        value = self.get(key)
+        if value is None:
+            return None
+        meta, _, body = value.partition(b"\n")
+        return json.loads(meta), body
+
+    def store(self, key: str, meta: dict, body: bytes):
+        self.set(key, json.dumps(meta).encode("utf-8") + b"\n" + body)
@@ -0,0 +1,155 @@
+import html
+import json
+import re
+from typing import NamedTuple
+
+# One pass over the SSML: an opening <voice> starts a new caption line, every other tag is dropped
+SSML_TAG_PATTERN = re.compile(r'<(voice)\b[^>]*>|<[^>]*>')
+WORD_CHAR_PATTERN = re.compile(r'\w')
+
+
+class Cue(NamedTuple):
+    start: float  # seconds
+    end: float
+    text: str
+
+
+def ssml_lines(ssml: str) -> list[str]:
+    """The spoken text of an SSML document, one entry per non-empty line, entities decoded."""
+    text = SSML_TAG_PATTERN.sub(lambda match: "\n" if match.group(1) else "", ssml)
+    return [html.unescape(line) for line in map(str.strip, text.splitlines()) if line]
+
+
+def estimate_cues(ssml: str, duration_in_seconds: float, max_words_per_cue: int = 30) -> list[Cue]:
+    """
+    Spreads the words of the script evenly over the audio. Only used when the
+    synthesis returned no boundaries, since real speech rate varies.
+    """
+    lines = [line.split() for line in ssml_lines(ssml)]
+    total_words = sum(map(len, lines))
+    if not total_words:
+        return []
+    seconds_per_word = duration_in_seconds / total_words
+
+    cues = []
+    elapsed_words = 0
+    for words in lines:
+        for j in range(0, len(words), max_words_per_cue):
+            chunk = words[j:j + max_words_per_cue]
+            start = elapsed_words * seconds_per_word
+            elapsed_words += len(chunk)
+            cues.append(Cue(start, elapsed_words * seconds_per_word, " ".join(chunk)))
+    return cues
+
+
+def boundary_cues(boundaries: dict, max_words_per_cue: int = 30) -> list[Cue]:
+    """
+    Groups word boundaries ({"text", "offset", "duration"} dicts) into cues. A
+    cue never spans two sentences and holds at most `max_words_per_cue` words.
+    Without word boundaries, sentences are split into cues by word count.
+    """
+    words = sorted(boundaries.get("words") or [], key=lambda boundary: boundary["offset"])
+    sentences = sorted(boundaries.get("sentences") or [], key=lambda boundary: boundary["offset"])
+    cues = []
+
+    if not words:
+        for sentence in sentences:
+            sentence_words = sentence["text"].split()
+            if not sentence_words:
+                continue
+            seconds_per_word = sentence["duration"] / len(sentence_words)
+            for j in range(0, len(sentence_words), max_words_per_cue):
+                chunk = sentence_words[j:j + max_words_per_cue]
+                start = sentence["offset"] + j * seconds_per_word
+                cues.append(Cue(start, start + len(chunk) * seconds_per_word, " ".join(chunk)))
+        return cues
+
+    sentence_starts = [sentence["offset"] for sentence in sentences]
+    next_sentence = 0
+    parts, count, start, end = [], 0, 0.0, 0.0
+    search_word_char = WORD_CHAR_PATTERN.search
+    for word in words:
+        text = word["text"]
+        is_punctuation = not (text.isalnum() or search_word_char(text))
+        new_sentence = False
+        while next_sentence < len(sentence_starts) and word["offset"] >= sentence_starts[next_sentence]:
+            next_sentence += 1
+            new_sentence = True
+        if parts and not is_punctuation and (new_sentence or count >= max_words_per_cue):
+            cues.append(Cue(start, end, "".join(parts)))
+            parts, count = [], 0
+        if not parts:
+            if is_punctuation:
+                continue
+            start = word["offset"]
+        # Punctuation comes as separate boundaries and attaches to the previous word
+        parts.append(text if is_punctuation or not parts else " " + text)
+        count += not is_punctuation
+        end = word["offset"] + word["duration"]
+    if parts:
+        cues.append(Cue(start, end, "".join(parts)))
+    return cues
+
+
+def format_timestamp(seconds: float, separator: str = ".") -> str:
+    """HH:MM:SS.mmm (WebVTT) or HH:MM:SS,mmm (SRT)."""
+    milliseconds = round(seconds * 1000)
+    hours, milliseconds = divmod(milliseconds, 3_600_000)
+    minutes, milliseconds = divmod(milliseconds, 60_000)
+    seconds, milliseconds = divmod(milliseconds, 1000)
+    return f"{hours:02}:{minutes:02}:{seconds:02}{separator}{milliseconds:03}"
+
+
+def wrap_text(text: str, max_line_length: int) -> str:
+    """Breaks text into lines of at most `max_line_length` characters at word boundaries."""
+    if len(text) <= max_line_length and "\n" not in text:
+        return text
+    lines, current, length = [], [], 0
+    for word in text.split():
+        if current and length + len(word) + 1 > max_line_length:
+            lines.append(" ".join(current))
+            current, length = [word], len(word)
+        else:
+            length += len(word) + (1 if current else 0)
+            current.append(word)
+    if current:
+        lines.append(" ".join(current))
+    return "\n".join(lines)
+
+
+def to_webvtt(cues: list[Cue], max_line_length: int = 45) -> str:
+    out = ["WEBVTT\n\n"]
+    for index, cue in enumerate(cues, 1):
+        text = wrap_text(cue.text, max_line_length).replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+        out.append(f"{index}\n{format_timestamp(cue.start)} --> {format_timestamp(cue.end)} line:5% align:center\n{text}\n\n")
+    return "".join(out)
+
+
+def to_srt(cues: list[Cue], max_line_length: int = 45) -> str:
+    out = []
+    for index, cue in enumerate(cues, 1):
+        out.append(
+            f"{index}\n{format_timestamp(cue.start, ',')} --> {format_timestamp(cue.end, ',')}\n"
+            f"{wrap_text(cue.text, max_line_length)}\n\n"
+        )
+    return "".join(out)
+
+
+def to_json(cues: list[Cue]) -> str:
+    """Cue list for the frontend player: [{"start": s, "end": s, "text": ...}]."""
+    return json.dumps(
+        [{"start": round(cue.start, 3), "end": round(cue.end, 3), "text": cue.text} for cue in cues],
+        ensure_ascii=False
+    )
+
+
+def from_json(data: str) -> list[Cue]:
+    return [Cue(cue["start"], cue["end"], cue["text"]) for cue in json.loads(data)]
+
+
+# Caption format name -> (renderer, media type)
+FORMATS = {
+    "vtt": (to_webvtt, "text/vtt"),
+    "srt": (to_srt, "application/x-subrip"),
+    "json": (to_json, "application/json"),
+}
@@ -0,0 +1,54 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+
+class ClientCache(Generic[T]):
+    """
+    Keeps API clients for user-supplied keys, so a key that is used again gets
+    its existing client instead of a new one.
+
+    Holds at most `max_size` clients, dropping the least recently used, and
+    drops clients that went unused for `idle_seconds`. Keys are stored as
+    hashes. Dropped clients are not closed: they are expected to share the
+    connection pool of a long-lived default client (see AsyncAnthropic.copy).
+    """
+
+    def __init__(self, factory: Callable[[str], T], max_size: int = 64, idle_seconds: float = 900):
+        self.factory = factory
+        self.max_size = max_size
+        self.idle_seconds = idle_seconds
+        self._clients: OrderedDict[bytes, tuple[T, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, api_key: str) -> T:
+        """Returns the client for `api_key`, creating it if it is not cached."""
+        key = hashlib.sha256(api_key.encode("utf-8")).digest()
+        now = time.monotonic()
+        with self._lock:
+            self._evict_idle(now)
+            entry = self._clients.get(key)
+            if entry is not None:
+                client = entry[0]
+                self._clients.move_to_end(key)
+            else:
+                client = self.factory(api_key)
+            self._clients[key] = (client, now)
+            while len(self._clients) > self.max_size:
+                self._clients.popitem(last=False)
+        return client
+
+    def _evict_idle(self, now: float):
+        # Entries are in order of last use, the idle ones are at the front
+        while self._clients:
+            _, (_, last_used) = next(iter(self._clients.items()))
+            if now - last_used < self.idle_seconds:
+                break
+            self._clients.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._clients)
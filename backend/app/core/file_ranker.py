@@ -0,0 +1,196 @@
+import heapq
+import math
+import re
+from collections import Counter
+
+# Files that describe the project: dependencies, build and deployment
+MANIFEST_NAMES = {
+    "package.json", "pyproject.toml", "setup.py", "setup.cfg", "requirements.txt", "pipfile", "cargo.toml",
+    "go.mod", "pom.xml", "build.gradle", "build.gradle.kts", "gemfile", "composer.json", "mix.exs",
+    "package.swift", "cmakelists.txt", "makefile", "dockerfile", "docker-compose.yml", "docker-compose.yaml",
+    "deno.json", "pubspec.yaml", "project.clj", "build.sbt", "stack.yaml", "environment.yml",
+}
+ENTRY_POINT_STEMS = {
+    "main", "app", "__main__", "server", "index", "cli", "manage", "wsgi", "asgi", "lib", "mod", "api",
+    "application", "program", "bootstrap", "entry", "run", "start",
+}
+CORE_STEMS = {
+    "core", "engine", "router", "routes", "models", "model", "schema", "service", "services", "handler",
+    "handlers", "controller", "config", "settings", "client", "store", "pipeline", "types", "db", "database",
+}
+DESIGN_DOC_PATTERN = re.compile(r'(architecture|design|overview|internals|concepts)[^/]*\.(md|rst|txt)$')
+SOURCE_EXTENSIONS = {
+    "py", "js", "jsx", "ts", "tsx", "go", "rs", "java", "kt", "kts", "scala", "rb", "php", "c", "h", "cc",
+    "cpp", "hpp", "cs", "swift", "m", "mm", "ex", "exs", "erl", "hs", "ml", "clj", "dart", "lua", "r",
+    "jl", "zig", "nim", "vue", "svelte", "sol", "sh",
+}
+# Directories whose files rarely explain the architecture, matched by name at any depth
+PERIPHERAL_DIRECTORY_NAMES = {
+    "test", "tests", "__tests__", "spec", "specs", "testing", "example", "examples", "sample", "samples",
+    "fixture", "fixtures", "mock", "mocks", "benchmark", "benchmarks", "bench", "migration", "migrations",
+    "doc", "docs", "scripts", "tools", "third_party", "external", "deps", "build", "dist", "out", "target",
+    "assets", "static", "public", "i18n", "locale", "locales", "vendor", "node_modules", "e2e", ".github",
+    ".circleci",
+}
+TEST_FILE_PATTERN = re.compile(r'(^test_|_test\.|\.test\.|\.spec\.|_spec\.|tests?\.)')
+# Roots that only hold the real source tree
+SOURCE_ROOTS = {"src", "lib", "app", "pkg", "cmd", "internal", "source", "packages", "crates"}
+
+
+def name_score(name: str) -> float:
+    """
+    Importance of a file by its name alone, higher is more important.
+    Negative for files that are never picked.
+    """
+    lower = name.lower()
+    if lower in MANIFEST_NAMES:
+        return 6.0
+    dot = lower.rfind(".")
+    extension = lower[dot + 1:] if dot > 0 else ""
+    if extension not in SOURCE_EXTENSIONS:
+        if extension == "csproj":
+            return 6.0
+        if extension in ("md", "rst", "txt") and DESIGN_DOC_PATTERN.search(lower):
+            return 8.0  # usually in docs/, which costs 3
+        return -100.0  # assets, data, configuration; the README is fetched separately
+    stem = lower[:dot]
+    score = 2.0
+    if stem in ENTRY_POINT_STEMS:
+        score += 3.0
+    elif stem in CORE_STEMS:
+        score += 1.5
+    elif stem == "__init__":
+        score -= 1.0
+    if ("test" in lower or "spec" in lower) and TEST_FILE_PATTERN.search(lower):
+        score -= 4.0
+    return score
+
+
+def size_score(size: int | None) -> float:
+    if size is None:
+        return 0.0
+    if size < 200:
+        return -1.5  # stubs and empty package markers
+    if size > 200_000:
+        return -3.0  # generated or data files
+    # More code says more, with quickly diminishing returns
+    return min(1.0, math.log10(size / 200) / 3)
+
+
+def subtree_source_counts(source_directories: list[str]) -> Counter:
+    """
+    Number of source files in the subtree of every directory, given the
+    directory of each source file. Far fewer directories than files: each
+    directory passes its total up to its parent once, deepest level first.
+    """
+    counts = Counter(source_directories)
+    levels: dict[int, set[str]] = {}
+    for directory in counts:
+        levels.setdefault(directory.count("/"), set()).add(directory)
+    for depth in range(max(levels, default=0), 0, -1):
+        # Parents found on the way up join the next level, even without source files of their own
+        parents = levels.setdefault(depth - 1, set())
+        for directory in levels.get(depth, ()):
+            parent = directory[:directory.rfind("/")]
+            counts[parent] += counts[directory]
+            parents.add(parent)
+    return counts
+
+
+def directory_score(directory: str, weight: float) -> float:
+    """Adjustment for where a file lives: deep and peripheral directories lose, central ones gain."""
+    if not directory:
+        return 0.0
+    parts = directory.lower().split("/")
+    # Leading source roots like src/ do not make a file less central
+    score = weight - 0.6 * (len(parts) - (parts[0] in SOURCE_ROOTS))
+    if not PERIPHERAL_DIRECTORY_NAMES.isdisjoint(parts):
+        score -= 3.0
+    return score
+
+
+def rank_important_files(paths: list[str], sizes: dict[str, int] | None = None, limit: int = 10,
+                         per_directory: int = 3) -> list[str]:
+    """
+    Picks the files that best explain a repository, without an LLM call.
+
+    Favours manifests, entry points, design docs and source files near the
+    top of directories that hold much of the code; tests, examples, generated
+    and vendored files rank low. At most `per_directory` files are taken from
+    one directory so the picks cover the project. Deterministic, and linear
+    in the number of paths: names and directories are scored once each.
+
+    That per-name and per-directory Python work sets the cost: about
+    0.25-0.6 s per 100k paths in CPython, not milliseconds. The caller runs
+    it in a worker thread, once per commit, since repo data is cached by commit.
+
+    Args:
+        paths (list[str]): File paths of the repository
+        sizes (dict[str, int] | None): File sizes in bytes by path, if known
+        limit (int): Number of files to return
+        per_directory (int): Maximum picks from a single directory
+
+    Returns:
+        list[str]: Up to `limit` paths, most important first.
+    """
+    # Names repeat a lot (index.ts, __init__.py), each is scored once
+    name_scores: dict[str, float] = {}
+    source_names = set()
+    source_directories = []
+    candidates = []  # (name score, path, directory, name)
+    for path in paths:
+        slash = path.rfind("/")
+        name = path[slash + 1:]
+        score = name_scores.get(name)
+        if score is None:
+            score = name_scores[name] = name_score(name)
+            dot = name.rfind(".")
+            if dot > 0 and name[dot + 1:] in SOURCE_EXTENSIONS:
+                source_names.add(name)
+        if slash > 0 and name in source_names:
+            source_directories.append(path[:slash])
+        if score >= 0:
+            candidates.append((score, path, path[:slash] if slash > 0 else "", name))
+
+    counts = subtree_source_counts(source_directories)
+    largest = math.log1p(max(counts.values(), default=0)) or 1.0
+    # Directories repeat a lot too, each is scored once with its package name
+    directories: dict[str, tuple[float, str]] = {}
+    ranked = []
+    for score, path, directory, name in candidates:
+        entry = directories.get(directory)
+        if entry is None:
+            # Directories that hold most of the code weigh up to 1.5
+            weight = 1.5 * math.log1p(counts[directory]) / largest
+            package = directory[directory.rfind("/") + 1:]
+            entry = directories[directory] = (directory_score(directory, weight), package)
+        score += entry[0]
+        if name.startswith(entry[1]) and name.rsplit(".", 1)[0] == entry[1]:
+            score += 1.5  # named like its package, e.g. foo/foo.go
+        if sizes:
+            score += size_score(sizes.get(path))
+        if score >= 0:
+            # Ties break on the shorter, then alphabetically first path
+            ranked.append((-score, len(path), path, directory))
+
+    # Only the picks leave the heap, skipping those over the per-directory cap
+    heapq.heapify(ranked)
+    picks = []
+    per_directory_count = Counter()
+    while ranked and len(picks) < limit:
+        _, _, path, directory = heapq.heappop(ranked)
+        if per_directory_count[directory] < per_directory:
+            per_directory_count[directory] += 1
+            picks.append(path)
+    return picks
+
+# Example usage
+if __name__ == "__main__":
+    import time
+    tree = [
+        "README.md", "pyproject.toml", "docs/architecture.md", "src/pkg/__init__.py", "src/pkg/main.py",
+        "src/pkg/core/engine.py", "src/pkg/core/utils.py", "tests/test_engine.py", "examples/demo.py",
+    ] + [f"src/pkg/plugins/p{i}/plugin.py" for i in range(100_000)]
+    start = time.perf_counter()
+    print(rank_important_files(tree))
+    print(f"{(time.perf_counter() - start) * 1000:.0f} ms for {len(tree)} paths")
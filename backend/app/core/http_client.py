@@ -0,0 +1,30 @@
+import httpx
+
+# One keep-alive HTTP/2 pool per worker process, shared by every service that
+# talks to an external API, so repeated calls reuse open TLS connections.
+_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Returns the shared async HTTP client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(30.0, connect=10.0),
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=60.0
+            ),
+            follow_redirects=True,
+        )
+    return _client
+
+
+async def close_http_client():
+    """Closes the httpx client used for GitHub and Azure speech calls, if it was created."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,184 @@
+import asyncio
+import json
+import time
+import uuid
+from app.core.cache import get_connection, get_cache_path
+
+
+class JobStore:
+    """
+    Generation jobs persisted in SQLite. Every worker process sees the same
+    queue, and a job whose runner disappeared (restart, crash) is handed to
+    another runner once its heartbeat is older than `stale_after` seconds.
+    Finished jobs and their results are deleted `retention` seconds after
+    they finished, swept while claiming jobs.
+    """
+    SWEEP_INTERVAL = 600  # seconds between retention sweeps in one process
+
+    def __init__(self, path: str | None = None, stale_after: float = 120, max_attempts: int = 3,
+                 retention: float = 24 * 3600):
+        self.path = path or get_cache_path("jobs.db")
+        self.stale_after = stale_after
+        self.max_attempts = max_attempts
+        self.retention = retention
+        self._last_sweep = 0.0
+        self._conn, self._lock = get_connection(self.path)
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at)")
+
+    def create(self, kind: str, payload: dict) -> str:
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, kind, payload, status, created_at, updated_at) VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, kind, json.dumps(payload), now, now)
+            )
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, kind, status, result, error, attempts, created_at, updated_at FROM jobs WHERE id = ?",
+                (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "error": row[4],
+            "attempts": row[5],
+            "created_at": row[6],
+            "updated_at": row[7],
+        }
+
+    def claim(self) -> tuple[str, str, dict] | None:
+        """Atomically takes the oldest runnable job, returns (id, kind, payload)."""
+        now = time.time()
+        if now - self._last_sweep >= self.SWEEP_INTERVAL:
+            self._last_sweep = now
+            self._sweep(now)
+        with self._lock:
+            # Jobs that keep killing their runner are not retried forever
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Job was interrupted too many times', updated_at = ? "
+                "WHERE status = 'running' AND updated_at < ? AND attempts >= ?",
+                (now, now - self.stale_after, self.max_attempts)
+            )
+            row = self._conn.execute(
+                """
+                UPDATE jobs SET status = 'running', attempts = attempts + 1, updated_at = ?
+                WHERE id = (
+                    SELECT id FROM jobs
+                    WHERE status = 'queued' OR (status = 'running' AND updated_at < ?)
+                    ORDER BY created_at LIMIT 1
+                )
+                RETURNING id, kind, payload
+                """,
+                (now, now - self.stale_after)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def _sweep(self, now: float):
+        with self._lock:
+            deleted = self._conn.execute(
+                "DELETE FROM jobs WHERE status IN ('succeeded', 'failed') AND updated_at < ?",
+                (now - self.retention,)
+            ).rowcount
+        if deleted:
+            print(f"Deleted {deleted} finished jobs older than {self.retention / 3600:g} hours")
+
+    def heartbeat(self, job_id: str):
+        with self._lock:
+            self._conn.execute("UPDATE jobs SET updated_at = ? WHERE id = ? AND status = 'running'", (time.time(), job_id))
+
+    def complete(self, job_id: str, result: dict):
+        self._finish(job_id, "succeeded", result=json.dumps(result))
+
+    def fail(self, job_id: str, error: str):
+        self._finish(job_id, "failed", error=error)
+
+    def _finish(self, job_id: str, status: str, result: str | None = None, error: str | None = None):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, result, error, time.time(), job_id)
+            )
+
+
+class JobWorkerPool:
+    """
+    A fixed number of asyncio workers per process pulling jobs from a JobStore.
+    `handlers` maps a job kind to an async function taking the payload and
+    returning the result dict; raising marks the job as failed.
+    """
+
+    def __init__(self, store: JobStore, handlers: dict, size: int = 2, poll_interval: float = 2.0):
+        self.store = store
+        self.handlers = handlers
+        self.size = size
+        self.poll_interval = poll_interval
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.size)]
+
+    async def stop(self):
+        # Interrupted jobs stay 'running' and are picked up again once stale
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Wakes idle workers in this process right after a job was queued."""
+        self._wakeup.set()
+
+    async def _run(self):
+        while True:
+            job = self.store.claim()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._execute(*job)
+
+    async def _execute(self, job_id: str, kind: str, payload: dict):
+        heartbeat = asyncio.create_task(self._heartbeat(job_id))
+        try:
+            result = await self.handlers[kind](payload)
+            self.store.complete(job_id, result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self.store.fail(job_id, str(e))
+        finally:
+            heartbeat.cancel()
+
+    async def _heartbeat(self, job_id: str):
+        while True:
+            await asyncio.sleep(self.store.stale_after / 4)
+            self.store.heartbeat(job_id)
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from typing import Iterator
+
+# Bitrates in kbps by [MPEG-1?][layer][index]; index 0 (free) and 15 (bad) are unsupported
+BITRATES = {
+    True: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    False: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+LAYERS = {3: 1, 2: 2, 1: 3}
+
+
+@dataclass(frozen=True)
+class FrameHeader:
+    version: int  # 3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5 (raw header bits)
+    layer: int
+    bitrate: int  # bits per second
+    sample_rate: int
+    padding: int
+    mono: bool
+
+    @property
+    def mpeg1(self) -> bool:
+        return self.version == 3
+
+    @property
+    def samples(self) -> int:
+        if self.layer == 1:
+            return 384
+        if self.layer == 3 and not self.mpeg1:
+            return 576
+        return 1152
+
+    @property
+    def length(self) -> int:
+        if self.layer == 1:
+            return (12 * self.bitrate // self.sample_rate + self.padding) * 4
+        return self.samples // 8 * self.bitrate // self.sample_rate + self.padding
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate
+
+
+def parse_header(data: bytes, offset: int) -> FrameHeader | None:
+    """Decodes the 4-byte frame header at `offset`, None if there is none."""
+    if offset + 4 > len(data) or data[offset] != 0xFF or data[offset + 1] & 0xE0 != 0xE0:
+        return None
+    b1, b2, b3 = data[offset + 1], data[offset + 2], data[offset + 3]
+    version = (b1 >> 3) & 0x3
+    layer_bits = (b1 >> 1) & 0x3
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x3
+    if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    layer = LAYERS[layer_bits]
+    return FrameHeader(
+        version=version,
+        layer=layer,
+        bitrate=BITRATES[version == 3][layer][bitrate_index] * 1000,
+        sample_rate=SAMPLE_RATES[version][sample_rate_index],
+        padding=(b2 >> 1) & 0x1,
+        mono=(b3 >> 6) == 0x3,
+    )
+
+
+def skip_id3v2(data: bytes) -> int:
+    """Returns the offset of the first byte after a leading ID3v2 tag (0 if there is none)."""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return 0
+    # Syncsafe integer, 7 bits per byte
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def iter_frames(data: bytes) -> Iterator[tuple[int, FrameHeader]]:
+    """
+    Yields (offset, header) for every MPEG audio frame in `data`, skipping
+    ID3 tags. After junk bytes a candidate header is only trusted if another
+    frame follows it, so stray 0xFF bytes are not mistaken for frames.
+    """
+    offset = skip_id3v2(data)
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b"TAG":
+        end -= 128
+    in_sync = True
+    while offset + 4 <= end:
+        header = parse_header(data, offset)
+        if header is None or header.length < 4 or offset + header.length > end:
+            in_sync = False
+            offset += 1
+            continue
+        next_offset = offset + header.length
+        if not in_sync and next_offset + 4 <= end and parse_header(data, next_offset) is None:
+            offset += 1
+            continue
+        in_sync = True
+        yield offset, header
+        offset = next_offset
+
+
+def side_info_size(header: FrameHeader) -> int:
+    if header.mpeg1:
+        return 17 if header.mono else 32
+    return 9 if header.mono else 17
+
+
+def is_info_frame(data: bytes, offset: int, header: FrameHeader) -> bool:
+    """True for a Xing/Info or VBRI frame, which carries stream metadata instead of audio."""
+    xing = offset + 4 + side_info_size(header)
+    return data[xing:xing + 4] in (b"Xing", b"Info") or data[offset + 36:offset + 40] == b"VBRI"
+
+
+def audio_frames(data: bytes) -> bytes:
+    """The audio frames of an MP3 file, without ID3 tags or a Xing/Info/VBRI header frame."""
+    chunks = []
+    for index, (offset, header) in enumerate(iter_frames(data)):
+        if index == 0 and is_info_frame(data, offset, header):
+            continue
+        chunks.append(data[offset:offset + header.length])
+    return b"".join(chunks)
+
+
+def info_frame_count(data: bytes, offset: int, header: FrameHeader) -> int | None:
+    """Number of audio frames declared by a Xing/Info or VBRI header, if it has one."""
+    xing = offset + 4 + side_info_size(header)
+    if data[xing:xing + 4] in (b"Xing", b"Info"):
+        flags = int.from_bytes(data[xing + 4:xing + 8], "big")
+        if flags & 0x1:
+            return int.from_bytes(data[xing + 8:xing + 12], "big")
+    elif data[offset + 36:offset + 40] == b"VBRI":
+        return int.from_bytes(data[offset + 50:offset + 54], "big")
+    return None
+
+
+def duration(data: bytes) -> float | None:
+    """
+    Playing time of an MP3 file in seconds, without decoding it.
+
+    Uses the frame count of a Xing/Info or VBRI header when present, otherwise
+    adds up the durations of all frame headers. Returns None if `data`
+    contains no MPEG audio frames.
+    """
+    frames = iter_frames(data)
+    first = next(frames, None)
+    if first is None:
+        return None
+    offset, header = first
+    frame_count = info_frame_count(data, offset, header)
+    if frame_count is not None:
+        return frame_count * header.samples / header.sample_rate
+    return header.duration + sum(frame_header.duration for _, frame_header in frames)
@@ -0,0 +1,225 @@
+import re
+from dataclasses import dataclass, field
+from app.core.tokens import TokenEstimator
+
+MARKDOWN_EXTENSIONS = (".md", ".markdown", ".mdx")
+MARKDOWN_HEADING_PATTERN = re.compile(r'^#{1,6}\s')
+# Lines that continue the statement above them even in column 0
+CLOSING_CHARACTERS = ("}", ")", "]")
+MIN_UNIT_CHARS = 200
+
+
+@dataclass
+class Section:
+    """One piece of prompt content, e.g. the README, the file tree or a source file."""
+    name: str
+    text: str
+    priority: int = 0  # lower is packed first
+    kind: str = "code"  # "code", "markdown" or "tree"
+    header: str = ""  # rendered before the text and kept with it, e.g. the file path
+
+
+@dataclass
+class PackedSection:
+    section: Section
+    text: str  # the kept part of the section text, with a note when something was cut
+    kept_units: int
+    total_units: int
+    omitted: list[str] = field(default_factory=list)  # labels of the blocks or paths left out
+
+    @property
+    def dropped(self) -> bool:
+        return self.kept_units == 0 and self.total_units > 0
+
+    @property
+    def truncated(self) -> bool:
+        return 0 < self.kept_units < self.total_units
+
+    def render(self) -> str:
+        return "" if self.dropped else self.section.header + self.text
+
+
+@dataclass
+class PackResult:
+    sections: list[PackedSection]  # in the order they were given
+    budget: int
+    tokens: int  # estimated tokens of the packed text
+
+    def __getitem__(self, name: str) -> PackedSection:
+        return next(packed for packed in self.sections if packed.section.name == name)
+
+    @property
+    def text(self) -> str:
+        return "".join(packed.render() for packed in self.sections)
+
+    def render(self, names: list[str]) -> str:
+        """The packed text of the named sections only, in the given order."""
+        return "".join(self[name].render() for name in names)
+
+    @property
+    def dropped(self) -> list[str]:
+        return [packed.section.name for packed in self.sections if packed.dropped]
+
+    @property
+    def truncated(self) -> list[str]:
+        return [packed.section.name for packed in self.sections if packed.truncated]
+
+    def report(self, max_labels: int = 5) -> str:
+        """One line per section that lost content, for the logs."""
+        lines = [f"Packed {self.tokens}/{self.budget} tokens from {len(self.sections)} sections"]
+        for packed in self.sections:
+            if packed.dropped:
+                lines.append(f"  dropped {packed.section.name}")
+            elif packed.truncated:
+                labels = ", ".join(packed.omitted[:max_labels])
+                more = f" and {len(packed.omitted) - max_labels} more" if len(packed.omitted) > max_labels else ""
+                lines.append(f"  cut {packed.section.name}: kept {packed.kept_units}/{packed.total_units}, "
+                             f"omitted {labels}{more}")
+        return "\n".join(lines)
+
+
+def split_code(text: str) -> list[str]:
+    """
+    Splits source code into top-level blocks: a block starts at a line in
+    column 0 that follows a blank line, so functions and classes stay whole
+    together with their decorators and leading comments. Works the same for
+    plain text, where the blocks are paragraphs.
+    """
+    units, current, previous_blank = [], [], True
+    for line in text.splitlines(keepends=True):
+        starts_block = previous_blank and line[:1].strip() and not line.startswith(CLOSING_CHARACTERS)
+        if starts_block and current and sum(map(len, current)) >= MIN_UNIT_CHARS:
+            units.append("".join(current))
+            current = []
+        current.append(line)
+        previous_blank = not line.strip()
+    if current:
+        units.append("".join(current))
+    return units
+
+
+def split_markdown(text: str) -> list[str]:
+    """Splits markdown at headings outside of code fences."""
+    units, current, in_fence = [], [], False
+    for line in text.splitlines(keepends=True):
+        if line.lstrip().startswith("```"):
+            in_fence = not in_fence
+        if not in_fence and MARKDOWN_HEADING_PATTERN.match(line) and current:
+            units.append("".join(current))
+            current = []
+        current.append(line)
+    if current:
+        units.append("".join(current))
+    return units
+
+
+def unit_label(unit: str) -> str:
+    first_line = next((line.strip() for line in unit.splitlines() if line.strip()), "")
+    return first_line if len(first_line) <= 60 else first_line[:57] + "..."
+
+
+class ContentPacker:
+    """
+    Fits prompt sections into a token budget, cutting only between files,
+    top-level blocks (functions, classes, paragraphs, markdown sections) or
+    file tree lines.
+
+    Sections are filled in order of priority. In a first pass no section may
+    take more than `max_share` of the budget, so one large file cannot starve
+    the rest; a second pass hands what is left to the sections that were cut,
+    again by priority. Code and markdown keep a prefix of their blocks; the
+    file tree keeps its shallowest paths. Every cut section ends with a note
+    saying how much was left out.
+    """
+    NOTE_TOKENS = 16  # reserved for the omission note of a section that gets cut
+
+    def __init__(self, estimator: TokenEstimator, max_share: float = 0.4):
+        self.estimator = estimator
+        self.max_share = max_share
+
+    @staticmethod
+    def file_section(path: str, text: str, priority: int = 0, header: str = "") -> Section:
+        """A section for a repository file, split by its type."""
+        kind = "markdown" if path.lower().endswith(MARKDOWN_EXTENSIONS) else "code"
+        return Section(path, text, priority, kind, header)
+
+    @staticmethod
+    def split(section: Section) -> tuple[list[str], list[int]]:
+        """The units of a section and the order in which they are kept."""
+        if section.kind == "tree":
+            units = section.text.splitlines()
+            return units, sorted(range(len(units)), key=lambda i: units[i].count("/"))
+        units = split_markdown(section.text) if section.kind == "markdown" else split_code(section.text)
+        return units, list(range(len(units)))
+
+    def pack(self, sections: list[Section], budget: int) -> PackResult:
+        """
+        Packs `sections` into at most `budget` estimated tokens.
+
+        Args:
+            sections (list[Section]): The content, in the order it should appear
+            budget (int): Token budget for all sections together, headers included
+
+        Returns:
+            PackResult: The kept text of every section and what was left out.
+        """
+        plans = []
+        for section in sections:
+            units, order = self.split(section)
+            plans.append({
+                "units": units,
+                "order": order,
+                "tokens": [self.estimator.estimate(unit) for unit in units],
+                "header": self.estimator.estimate(section.header) if section.header else 0,
+                "taken": 0,
+                "used": 0,
+            })
+
+        # Empty sections are rendered as their bare header
+        remaining = budget - sum(plan["header"] for plan in plans if not plan["units"])
+        ranked = sorted(range(len(sections)), key=lambda i: sections[i].priority)
+        for limit in (max(1, int(budget * self.max_share)), budget):
+            for i in ranked:
+                plan = plans[i]
+                while plan["taken"] < len(plan["order"]):
+                    cost = plan["tokens"][plan["order"][plan["taken"]]]
+                    if plan["taken"] == 0:
+                        cost += plan["header"] + (self.NOTE_TOKENS if len(plan["units"]) > 1 else 0)
+                    if plan["used"] + cost > limit or cost > remaining:
+                        break
+                    plan["used"] += cost
+                    plan["taken"] += 1
+                    remaining -= cost
+
+        packed_sections = []
+        for section, plan in zip(sections, plans):
+            units, taken = plan["units"], plan["taken"]
+            kept = sorted(plan["order"][:taken])
+            omitted = sorted(plan["order"][taken:])
+            # Tree lines are kept out of order, so they are joined without their own line ends
+            text = ("\n" if section.kind == "tree" else "").join(units[j] for j in kept)
+            if kept and omitted:
+                what = "deeper paths" if section.kind == "tree" else "blocks"
+                text += f"\n... [{len(omitted)} more {what} omitted]\n"
+            packed_sections.append(PackedSection(
+                section=section,
+                text=text,
+                kept_units=taken,
+                total_units=len(units),
+                omitted=[units[j].strip() if section.kind == "tree" else unit_label(units[j]) for j in omitted]
+            ))
+        return PackResult(packed_sections, budget, budget - remaining)
+
+
+# Example usage
+if __name__ == "__main__":
+    estimator = TokenEstimator()
+    packer = ContentPacker(estimator)
+    source = "\n\n".join(f"def function_{i}():\n    return {'x' * 400!r}\n" for i in range(20))
+    result = packer.pack([
+        Section("FILE TREE", "\n".join(f"src/{'sub/' * (i % 4)}file_{i}.py" for i in range(200)), 1, "tree"),
+        Section("README", "# Project\n\nIntro.\n\n## Usage\n\nRun it.\n", 0, "markdown"),
+        packer.file_section("src/big.py", source, 2, "FPATH: src/big.py \n CONTENT:"),
+    ], budget=1500)
+    print(result.report())
+    print(result["src/big.py"].text[-200:])
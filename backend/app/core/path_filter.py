@@ -0,0 +1,211 @@
+import copy
+import re
+
+# Rule syntax, matched case-insensitively against the whole path:
+#   "name/"          a directory of that name at any depth
+#   ".ext", "*.ext"  a file extension
+#   anything else    a substring of the path, e.g. ".min." or "yarn.lock"
+DEFAULT_EXCLUDE = [
+    # Dependencies
+    'node_modules/', 'vendor/', 'venv/',
+    # Compiled files
+    '.min.', '.pyc', '.pyo', '.pyd', '.so', '.dll', '.class',
+    # Asset files
+    '.jpg', '.jpeg', '.png', '.gif', '.ico', '.svg', '.ttf', '.woff', '.webp',
+    # Cache and temporary files
+    '__pycache__/', '.cache/', '.tmp/',
+    # Lock files and logs
+    'yarn.lock', 'poetry.lock', '*.log',
+    # Configuration files
+    '.vscode/', '.idea/',
+    # Binaries and media, which can never be read as text
+    '.woff2', '.eot', '.otf', '.bmp', '.tiff', '.psd', '.pdf', '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z',
+    '.tar', '.jar', '.war', '.exe', '.bin', '.o', '.a', '.dylib', '.wasm', '.mp3', '.mp4', '.wav', '.ogg',
+    '.mov', '.avi', '.webm', '.sqlite', '.db', '.pkl', '.npy', '.h5', '.onnx', '.pt',
+]
+EXTENSION_RULE_PATTERN = re.compile(r'^\*?\.[^./*]+$')
+
+
+def compile_rules(rules: list[str]) -> tuple[frozenset[str], re.Pattern | None, re.Pattern | None]:
+    """
+    Compiles exclusion rules into a set of extensions, a regex for the
+    directory part of a path and a regex for the file name. Directories are
+    shared by many files, so filter_tree searches each of them only once.
+    """
+    extensions = set()
+    directory_names, substrings, path_substrings = [], [], []
+    for rule in map(str.lower, rules):
+        if EXTENSION_RULE_PATTERN.match(rule):
+            extensions.add(rule.lstrip("*."))
+        elif rule.endswith("/") and "/" not in rule[:-1]:
+            directory_names.append(re.escape(rule[:-1]))
+        elif "/" in rule:
+            path_substrings.append(re.escape(rule))
+        else:
+            substrings.append(re.escape(rule))
+
+    # The directory part is searched with a trailing slash, so "a/b/" also catches "b/"
+    directory_patterns = substrings + path_substrings
+    if directory_names:
+        directory_patterns.insert(0, r'(?:^|/)(?:' + "|".join(directory_names) + r')/')
+    name_patterns = substrings
+    return (
+        frozenset(extensions),
+        re.compile("|".join(directory_patterns)) if directory_patterns else None,
+        re.compile("|".join(name_patterns)) if name_patterns else None,
+    )
+
+
+def glob_to_regex(pattern: str, directory: str = "") -> str:
+    """
+    Translates a .gitattributes pattern into a regex for full paths. A
+    pattern without a slash matches the file name at any depth below
+    `directory`, one with a slash is relative to `directory`.
+    """
+    anchored = "/" in pattern.rstrip("/")
+    pattern = pattern.strip("/")
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append(r'(?:.*/)?')
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(r'.*')
+            i += 2
+        elif pattern[i] == "*":
+            out.append(r'[^/]*')
+            i += 1
+        elif pattern[i] == "?":
+            out.append(r'[^/]')
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            content = pattern[i + 1:end]
+            if content[0] in "!^":
+                content = "^" + content[1:]
+            out.append("[" + content.replace("\\", "\\\\") + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    prefix = re.escape(directory + "/") if directory else ""
+    return prefix + ("" if anchored else r'(?:.*/)?') + "".join(out) + r'$'
+
+
+class PathFilter:
+    """
+    Decides which entries of a repository tree go into the prompt.
+
+    Exclusion rules are compiled once: extension rules become one set lookup
+    per path, the others one regex search on the file name and one per
+    directory. On top of that it drops everything that is not a regular file
+    (directories, submodules), files above `max_file_size`, and files
+    .gitattributes marks as linguist-generated or linguist-vendored.
+    """
+
+    def __init__(self, exclude: list[str] | None = None, max_file_size: int | None = None):
+        self.rules = list(DEFAULT_EXCLUDE if exclude is None else exclude)
+        self.max_file_size = max_file_size
+        self._extensions, self._directory_exclude, self._name_exclude = compile_rules(self.rules)
+        # (regex, excluded) in file order; the last matching line decides
+        self._attributes: list[tuple[re.Pattern, bool]] = []
+        self._any_attribute: re.Pattern | None = None
+
+    def add_gitattributes(self, text: str, directory: str = ""):
+        """
+        Reads the linguist-generated / linguist-vendored lines of a
+        .gitattributes file in `directory`. Call for parent directories first,
+        since deeper files override them.
+        """
+        for line in text.splitlines():
+            fields = line.split()
+            if not fields or fields[0].startswith("#"):
+                continue
+            value = None
+            for attribute in fields[1:]:
+                name, _, setting = attribute.partition("=")
+                if name.lstrip("-!") not in ("linguist-generated", "linguist-vendored"):
+                    continue
+                # "attr" and "attr=true" set it; "-attr", "!attr" and "attr=false" unset it
+                value = not (name[0] in "-!" or setting.lower() == "false")
+            if value is not None:
+                self._attributes.append((re.compile(glob_to_regex(fields[0], directory)), value))
+        if self._attributes:
+            self._any_attribute = re.compile("|".join(f"(?:{regex.pattern})" for regex, _ in self._attributes))
+
+    def for_repository(self, gitattributes: list[tuple[str, str]]) -> "PathFilter":
+        """
+        A copy of this filter that also applies a repository's .gitattributes
+        files, given as (directory, text) pairs; the compiled rules are shared.
+        """
+        path_filter = copy.copy(self)
+        path_filter._attributes = list(self._attributes)
+        for directory, text in sorted(gitattributes, key=lambda item: item[0].count("/") + bool(item[0])):
+            path_filter.add_gitattributes(text, directory)
+        return path_filter
+
+    def is_generated_or_vendored(self, path: str) -> bool:
+        if self._any_attribute is None or not self._any_attribute.match(path):
+            return False
+        for regex, value in reversed(self._attributes):
+            if regex.match(path):
+                return value
+        return False
+
+    def excludes_directory(self, directory: str) -> bool:
+        """True if a rule matches the directory part of a path ("" for the root, lowercase)."""
+        return bool(directory) and self._directory_exclude is not None \
+            and self._directory_exclude.search(directory + "/") is not None
+
+    def include(self, path: str, entry_type: str = "blob", size: int | None = None) -> bool:
+        return bool(self.filter_tree([{"path": path, "type": entry_type, "size": size}]))
+
+    def filter_tree(self, entries: list[dict]) -> list[dict]:
+        """The entries of a git tree API response that should be shown to the LLM."""
+        # One loop without per-entry calls; this runs for every entry of very large trees
+        extensions = self._extensions
+        name_exclude = self._name_exclude.search if self._name_exclude is not None else None
+        max_file_size = self.max_file_size
+        directory_excluded: dict[str, bool] = {}
+        kept = []
+        for entry in entries:
+            if entry.get("type", "blob") != "blob":
+                continue
+            size = entry.get("size")
+            if max_file_size is not None and size is not None and size > max_file_size:
+                continue
+            path = entry["path"]
+            lower = path.lower()
+            slash = lower.rfind("/")
+            name = lower[slash + 1:]
+            dot = name.rfind(".")
+            if (dot > 0 and name[dot + 1:] in extensions) or (name_exclude is not None and name_exclude(name)):
+                continue
+            if slash > 0:
+                directory = lower[:slash]
+                excluded = directory_excluded.get(directory)
+                if excluded is None:
+                    excluded = directory_excluded[directory] = self.excludes_directory(directory)
+                if excluded:
+                    continue
+            if self._any_attribute is not None and self.is_generated_or_vendored(path):
+                continue
+            kept.append(entry)
+        return kept
+
+
+# Example usage
+if __name__ == "__main__":
+    path_filter = PathFilter(max_file_size=1024 * 1024)
+    path_filter.add_gitattributes("dist/** linguist-generated\n*.pb.go linguist-generated=true\nlib/keep.js -linguist-vendored\n")
+    for entry in [
+        {"path": "src/app.py", "type": "blob", "size": 1200},
+        {"path": "src", "type": "tree"},
+        {"path": "api/service.pb.go", "type": "blob", "size": 900},
+        {"path": "dist/bundle.js", "type": "blob", "size": 800},
+        {"path": "data/dump.json", "type": "blob", "size": 50 * 1024 * 1024},
+        {"path": "src/sort.js", "type": "blob", "size": 300},
+        {"path": "logs/server.log", "type": "blob", "size": 300},
+    ]:
+        print(f"{entry['path']:<22} {path_filter.include(entry['path'], entry['type'], entry.get('size'))}")
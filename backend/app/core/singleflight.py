@@ -0,0 +1,150 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+import uuid
+from app.core.cache import get_connection, get_cache_path
+
+
+class SingleFlight:
+    """
+    Makes sure only one caller at a time computes a given key, across threads,
+    coroutines and worker processes.
+
+    Within a process, followers wait on the leader's future. Across processes
+    the leader holds a lease row in SQLite (renewed while it works) and other
+    processes poll `lookup` until the leader's result shows up in the shared
+    store it writes to, or until the lease is released or expires, in which
+    case they take over.
+
+    `lookup` must be a synchronous, thread-safe read of that shared store
+    returning None on a miss; `compute` must write its result to the store.
+    """
+
+    def __init__(self, name: str, lease_seconds: float = 60, poll_interval: float = 1.0, path: str | None = None):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        self._inflight: dict[str, concurrent.futures.Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._conn, self._lock = get_connection(path or get_cache_path("cache.db"))
+        with self._lock:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS flight_leases (
+                    key TEXT PRIMARY KEY,
+                    owner TEXT NOT NULL,
+                    expires_at REAL NOT NULL
+                )
+            """)
+
+    async def run(self, key: str, compute, lookup):
+        """
+        Returns the result for `key`, calling the async `compute` only if no
+        other caller is computing it. Cancelling a follower leaves the leader
+        and other followers alone; if the leader is cancelled, its followers
+        start over and one of them takes the lease.
+        """
+        while True:
+            future, leader = self._join(key)
+            if not leader:
+                try:
+                    return await asyncio.shield(asyncio.wrap_future(future))
+                except _LeaderCancelled:
+                    continue
+            try:
+                result = await self._lead(key, compute, lookup)
+            except BaseException as e:
+                # Leave first, so followers that start over elect a new leader
+                self._leave(key)
+                future.set_exception(_LeaderCancelled() if isinstance(e, asyncio.CancelledError) else e)
+                raise
+            self._leave(key)
+            future.set_result(result)
+            return result
+
+    async def _lead(self, key, compute, lookup):
+        # lookup and the lease queries can wait on SQLite locks, so they run in threads
+        while True:
+            result = await asyncio.to_thread(lookup)
+            if result is not None:
+                return result
+            if await asyncio.to_thread(self._acquire, key):
+                try:
+                    # Another process may have finished between our lookup and acquiring the lease
+                    result = await asyncio.to_thread(lookup)
+                    if result is None:
+                        with self._renewing(key):
+                            result = await compute()
+                    return result
+                finally:
+                    await asyncio.to_thread(self._release, key)
+            await asyncio.sleep(self.poll_interval)
+
+    def _join(self, key):
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future, False
+            future = concurrent.futures.Future()
+            self._inflight[key] = future
+            return future, True
+
+    def _leave(self, key):
+        with self._inflight_lock:
+            self._inflight.pop(key, None)
+
+    def _lease_key(self, key):
+        return f"{self.name}:{key}"
+
+    def _acquire(self, key) -> bool:
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO flight_leases (key, owner, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+                "WHERE flight_leases.expires_at < ?",
+                (self._lease_key(key), self._owner, now + self.lease_seconds, now)
+            )
+            return cursor.rowcount == 1
+
+    def _release(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM flight_leases WHERE key = ? AND owner = ?", (self._lease_key(key), self._owner))
+
+    def _renewing(self, key):
+        return _LeaseRenewer(self, key)
+
+    def _renew(self, key):
+        with self._lock:
+            self._conn.execute(
+                "UPDATE flight_leases SET expires_at = ? WHERE key = ? AND owner = ?",
+                (time.time() + self.lease_seconds, self._lease_key(key), self._owner)
+            )
+
+
+class _LeaderCancelled(Exception):
+    """Set on the followers' future when the leader was cancelled."""
+
+
+class _LeaseRenewer:
+    """Keeps a lease alive from a background thread while the leader computes."""
+
+    def __init__(self, flight: SingleFlight, key: str):
+        self._flight = flight
+        self._key = key
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+
+    def __exit__(self, *exc_info):
+        # Not joined: a renewal blocked on SQLite would block the event loop.
+        # A renewal that runs after the release matches no row.
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.wait(self._flight.lease_seconds / 3):
+            self._flight._renew(self._key)
@@ -0,0 +1,44 @@
+import re
+
+SPEAK_OPEN_PATTERN = re.compile(r'<speak\b[^>]*>')
+VOICE_BLOCK_PATTERN = re.compile(r'<voice\b[^>]*>.*?</voice>', re.DOTALL)
+VOICE_CLOSE = "</voice>"
+
+
+class VoiceBlockParser:
+    """
+    Picks complete <voice>...</voice> blocks out of SSML that arrives in
+    arbitrary chunks, e.g. streamed LLM tokens. Blocks are found with the same
+    pattern as over the finished document, in the same order; text outside
+    voice blocks is skipped, only the unfinished tail is buffered.
+    """
+
+    def __init__(self):
+        self.speak_open: str | None = None
+        self._buffer = ""
+        self._scan_from = 0
+
+    def feed(self, chunk: str) -> list[str]:
+        """Adds streamed text and returns the voice blocks it completed."""
+        self._buffer += chunk
+        if self.speak_open is None:
+            match = SPEAK_OPEN_PATTERN.search(self._buffer)
+            if match is None:
+                return []
+            self.speak_open = match.group(0)
+            self._buffer = self._buffer[match.end():]
+            self._scan_from = 0
+
+        blocks = []
+        while True:
+            # Only text after the last scan can complete a closing tag
+            close = self._buffer.find(VOICE_CLOSE, self._scan_from)
+            if close == -1:
+                self._scan_from = max(0, len(self._buffer) - len(VOICE_CLOSE) + 1)
+                return blocks
+            end = close + len(VOICE_CLOSE)
+            match = VOICE_BLOCK_PATTERN.search(self._buffer, 0, end)
+            if match is not None:
+                blocks.append(match.group(0))
+            self._buffer = self._buffer[end:]
+            self._scan_from = 0
@@ -0,0 +1,90 @@
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+class TokenEstimator:
+    """
+    Counts prompt tokens locally instead of asking the Anthropic API.
+
+    Uses a tiktoken encoding when available, otherwise about four characters
+    per token. Neither matches the remote counter exactly, so raw counts are
+    multiplied by `calibration`, the ratio of remote to local counts measured
+    with benchmarks/token_calibration.py. Results are memoized by content hash.
+    """
+    CHARS_PER_TOKEN = 4
+
+    def __init__(self, calibration: float = 1.0, encoding: str = "o200k_base", cache_size: int = 1024):
+        self.calibration = calibration
+        self.encoding_name = encoding
+        self.cache_size = cache_size
+        self._encoding = None
+        self._encoding_loaded = False
+        self._counts: OrderedDict[bytes, int] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def encoding(self):
+        # tiktoken downloads the encoding on first use, which may fail without network access
+        if not self._encoding_loaded:
+            with self._lock:
+                if not self._encoding_loaded:
+                    if tiktoken is not None:
+                        try:
+                            self._encoding = tiktoken.get_encoding(self.encoding_name)
+                        except Exception as e:
+                            print(f"{e} Falling back to character based token estimates")
+                    self._encoding_loaded = True
+        return self._encoding
+
+    def load_encoding(self):
+        """Loads (and possibly downloads) the encoding now instead of on the first count, e.g. at startup."""
+        return self.encoding
+
+    def raw_count(self, text: str) -> int:
+        """Uncalibrated local token count."""
+        if self.encoding is not None:
+            return len(self.encoding.encode(text, disallowed_special=()))
+        return math.ceil(len(text) / self.CHARS_PER_TOKEN)
+
+    def estimate(self, text: str) -> int:
+        """Like count, without memoizing; for many small pieces that are counted once."""
+        return math.ceil(self.raw_count(text) * self.calibration)
+
+    def count(self, text: str) -> int:
+        """Estimated number of tokens the remote tokenizer would count for `text`."""
+        key = hashlib.sha256(text.encode("utf-8")).digest()
+        with self._lock:
+            if key in self._counts:
+                self._counts.move_to_end(key)
+                return self._counts[key]
+        count = self.estimate(text)
+        with self._lock:
+            self._counts[key] = count
+            if len(self._counts) > self.cache_size:
+                self._counts.popitem(last=False)
+        return count
+
+    def calibrate(self, samples: list[tuple[str, int]]) -> float:
+        """
+        Sets the calibration from (text, remote token count) pairs and returns it.
+
+        Args:
+            samples (list[tuple[str, int]]): Texts with the counts the remote API reported
+
+        Returns:
+            float: Ratio of remote to local tokens over all samples
+        """
+        local = sum(self.raw_count(text) for text, _ in samples)
+        remote = sum(remote_count for _, remote_count in samples)
+        if local:
+            with self._lock:
+                self.calibration = remote / local
+                self._counts.clear()
+        return self.calibration
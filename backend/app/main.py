@@ -2,15 +2,32 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
-from app.routers import generate, modify
+from app.routers import generate, modify, metrics
 from app.core.limiter import limiter
 from typing import cast
 from starlette.exceptions import ExceptionMiddleware
 from api_analytics.fastapi import Analytics
+from app.core.http_client import close_http_client
+from app.services import claude_service, openai_service
+from contextlib import asynccontextmanager
+import asyncio
 import os
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The tokenizer may download its encoding; do that once here, not on a request
+    await asyncio.to_thread(generate.token_estimator.load_encoding)
+    generate.job_pool.start()
+    yield
+    await generate.job_pool.stop()
+    # Each service keeps its own keep-alive pool
+    await close_http_client()
+    await claude_service.close_client()
+    await openai_service.close_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 
 origins = [
@@ -38,6 +55,7 @@ app.add_exception_handler(RateLimitExceeded, cast(
 
 app.include_router(generate.router)
 app.include_router(modify.router)
+app.include_router(metrics.router)
 
 
 @app.get("/")
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Request, HTTPException, Response
+from fastapi.responses import FileResponse
 from dotenv import load_dotenv
-from app.services.github_service import GitHubService
+from app.services.github_service import GitHubService, RepoSnapshot
 from app.services.claude_service import ClaudeService
 from app.services.speech_service import SpeechService
 from app.services.slide_service import SlideService
@@ -8,17 +9,23 @@ from app.services.openai_service import OpenAIService
 
 
 from app.core.limiter import limiter
+from app.core.cache import SQLiteCache
+from app.core.artifacts import ArtifactStore, MEDIA_TYPES
+from app.core.jobs import JobStore, JobWorkerPool
+from app.core.singleflight import SingleFlight
+from app.core.tokens import TokenEstimator
+from app.core.packer import ContentPacker, Section
+from app.core.file_ranker import rank_important_files
+from app.core import captions, mp3
 import os
 from app.prompts import PODCAST_SSML_PROMPT_AFTER_BREAK, PODCAST_SSML_PROMPT, PODCAST_SSML_PROMPT_BEFORE_BREAK, SLIDE_PROMPT
 from anthropic._exceptions import RateLimitError
 from pydantic import BaseModel
-from functools import lru_cache
+import asyncio
+import gzip
+import hashlib
 import re
-from tempfile import NamedTemporaryFile
-import base64
 from pydub import AudioSegment
-import io
-import concurrent.futures
 from clerk_backend_api import Clerk
 from clerk_backend_api.jwks_helpers import authenticate_request, AuthenticateRequestOptions
 
@@ -33,6 +40,16 @@ claude_service = ClaudeService()
 speech_service = SpeechService()
 openai_service = OpenAIService()
 slide_service = SlideService()
+artifact_store = ArtifactStore(max_bytes=int(os.getenv("ARTIFACTS_MB", "2048")) * 1024 * 1024)
+# Local token counts for gating and /cost, scaled to match Anthropic's counter
+token_estimator = TokenEstimator(calibration=float(os.getenv("TOKEN_CALIBRATION", "1.0")))
+content_packer = ContentPacker(token_estimator)
+# Repository content per LLM call, kept a little under the 100k token gate since
+# the packer adds up per-block estimates
+CONTENT_TOKEN_BUDGET = int(os.getenv("CONTENT_TOKEN_BUDGET", "95000"))
+
+# e.g. "/_artifacts/" when nginx maps that internal location onto ARTIFACTS_DIR
+ARTIFACTS_ACCEL_PREFIX = os.getenv("ARTIFACTS_ACCEL_PREFIX")
 
 
 def is_signed_in(request: Request):
@@ -45,95 +62,246 @@ def is_signed_in(request: Request):
     print(request_state, request.headers)
     return request_state.is_signed_in
 
-# cache github data for 5 minutes to avoid double API calls from cost and generate
-@lru_cache(maxsize=100)
-def get_cached_github_data(username: str, repo: str):
-    default_branch = github_service.get_default_branch(username, repo)
-    if not default_branch:
-        default_branch = "main"  # fallback value
-
-    file_tree = github_service.get_github_file_paths_as_list(username, repo)
-    readme = github_service.get_github_readme(username, repo)
-    file_content = ""
-    try:
-        file_list = openai_service.get_important_files(file_tree)
-        for fpath in file_list:
-            content = github_service.get_github_file_content(username, repo, fpath)
-            discuss_or_not = "- discuss this file." if '.md' not in fpath else ""
-            file_content += f"FPATH: {fpath} {discuss_or_not} \n CONTENT:{content[:50000]}"
-    except Exception as e:
-        print(f"Some error in getting github file content {e}. Proceeding.")
+# cache github data to avoid double API calls from cost and generate. Entries are
+# keyed by commit, so a push is picked up immediately; the TTL only bounds how
+# long an unused commit is kept. Shared by all workers through SQLite.
+repo_data_cache = SQLiteCache(
+    "repo_data",
+    max_bytes=int(os.getenv("REPO_CACHE_MB", "64")) * 1024 * 1024,
+    ttl=int(os.getenv("REPO_CACHE_TTL", "300"))
+)
+
+# Single-flight guards for each pipeline stage, so a burst of requests for the
+# same repo does the work once and everyone else waits for that result
+repo_data_flight = SingleFlight("repo_data")
+llm_flight = SingleFlight("llm")
+synthesis_flight = SingleFlight("synthesis", lease_seconds=120, poll_interval=2.0)
+
+
+# local: rank files with heuristics only; hybrid: the LLM picks from the local
+# shortlist; llm: the LLM picks from the whole tree. Both LLM modes fall back to
+# the local ranking on failure.
+IMPORTANT_FILES_MODE = os.getenv("IMPORTANT_FILES_MODE", "local")
+IMPORTANT_FILES_SHORTLIST = int(os.getenv("IMPORTANT_FILES_SHORTLIST", "30"))
+
+# Bumped whenever the shape of the cached repository data changes
+REPO_DATA_VERSION = 2
+
+
+async def get_cached_github_data(username: str, repo: str):
+    snapshot = await github_service.get_repo_snapshot(username, repo)
+    cache_key = f"{snapshot.cache_key}#v{REPO_DATA_VERSION}"
+    # SQLite calls wait on locks shared with the other workers, so they run in threads
+    github_data = await asyncio.to_thread(repo_data_cache.get_json, cache_key)
+    if github_data is not None:
+        await asyncio.to_thread(repo_data_cache.record, "hits")
+        return github_data
+
+    await asyncio.to_thread(repo_data_cache.record, "misses")
+
+    async def fetch():
+        github_data = await get_github_data(snapshot)
+        await asyncio.to_thread(repo_data_cache.set_json, cache_key, github_data)
+        return github_data
+
+    # Concurrent requests for the same commit wait for one fetch
+    return await repo_data_flight.run(
+        cache_key, fetch, lambda: repo_data_cache.get_json(cache_key))
+
+
+async def get_github_data(snapshot: RepoSnapshot):
+    tree_entries = await github_service.get_file_tree(snapshot)
+    file_tree = "\n".join(path for path, _ in tree_entries)
+    file_list = await select_important_files(file_tree, {path: size for path, size in tree_entries if size is not None})
+
+    readme, files = await github_service.get_readme_and_files(snapshot, file_list)
+    # No single file can use more than the whole budget, cut the rest off before caching
+    files = await asyncio.to_thread(
+        lambda: [
+            (fpath, content_packer.pack([content_packer.file_section(fpath, content)], CONTENT_TOKEN_BUDGET)[fpath].text)
+            for fpath, content in files if content is not None
+        ]
+    )
 
     return {
-        "default_branch": default_branch,
+        "default_branch": snapshot.branch,
+        "sha": snapshot.sha,
         "file_tree": file_tree,
         "readme": readme,
-        "file_content": file_content
+        "files": files  # (path, content) in order of importance
     }
 
-def process_github_content(content, speech_prompt, max_length, max_tokens=None):
-    content = content[:max_length]
-    print(content[-200:])
 
+async def select_important_files(file_tree: str, sizes: dict[str, int] | None = None) -> list[str]:
+    """Up to 10 paths to read for the podcast, chosen as IMPORTANT_FILES_MODE says."""
+    paths = file_tree.splitlines()
+    shortlist_size = IMPORTANT_FILES_SHORTLIST if IMPORTANT_FILES_MODE == "hybrid" else 10
+    shortlist = await asyncio.to_thread(rank_important_files, paths, sizes, shortlist_size)
+    if IMPORTANT_FILES_MODE == "local":
+        return shortlist
+
+    candidates = shortlist if IMPORTANT_FILES_MODE == "hybrid" else paths
     try:
-        token_count = claude_service.count_tokens(content)
-        print(f"TOKEN COUNT: {token_count}")
-        if max_tokens and token_count > max_tokens:
-            return {
-                "error": "Content is too large for analysis."
-            }
+        file_list = await openai_service.get_important_files("\n".join(candidates))
+        # Only paths that exist, the model sometimes invents some
+        known = set(candidates)
+        file_list = [fpath for fpath in file_list if fpath in known][:10]
+        if file_list:
+            return file_list
     except Exception as e:
-        print(f"{e} Error in token count")
+        print(f"Some error in selecting important files {e}. Using the local ranking.")
+    return shortlist[:10]
 
-    with NamedTemporaryFile(delete=False, mode='w+', suffix='.txt') as temp_file:
-        temp_file.write(content)
-        temp_file_path = temp_file.name
 
-    try:
-        ssml_response = speech_service.generate_ssml_with_retry([temp_file_path], speech_prompt)
-        print(ssml_response[-200:])
-    finally:
-        os.remove(temp_file_path)
+def file_header(fpath):
+    discuss_or_not = "- discuss this file." if '.md' not in fpath else ""
+    return f"FPATH: {fpath} {discuss_or_not} \n CONTENT:"
+
+
+def pack_github_data(github_data, file_tree=True, readme=True, files=True) -> dict:
+    """
+    Fits the chosen parts of the repository data into CONTENT_TOKEN_BUDGET,
+    README first, then the file tree, then the files in order of importance.
+    Logs what had to be left out.
+
+    Returns:
+        dict: The packed "file_tree", "readme" and "files" text, empty for parts not chosen.
+    """
+    sections = []
+    if readme:
+        sections.append(Section("<readme>", github_data["readme"] or "", 0, "markdown"))
+    if file_tree:
+        sections.append(Section("<file tree>", github_data["file_tree"], 1, "tree"))
+    file_names = []
+    if files:
+        for rank, (fpath, content) in enumerate(github_data["files"]):
+            if fpath in file_names:
+                continue
+            sections.append(content_packer.file_section(fpath, content, 2 + rank, file_header(fpath)))
+            file_names.append(fpath)
+
+    packed = content_packer.pack(sections, CONTENT_TOKEN_BUDGET)
+    print(packed.report())
+    return {
+        "file_tree": packed["<file tree>"].render() if file_tree else "",
+        "readme": packed["<readme>"].render() if readme else "",
+        "files": packed.render(file_names),
+    }
+
+# LLM output for identical content, prompt and model is reused instead of regenerated
+llm_result_cache = SQLiteCache(
+    "llm_results",
+    max_bytes=int(os.getenv("LLM_CACHE_MB", "128")) * 1024 * 1024,
+    ttl=int(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+)
+
+
+def llm_cache_key(content, prompt):
+    """Content address of an LLM result: any change to the input, prompt or model changes it."""
+    digest = hashlib.sha256()
+    for part in (openai_service.model_name, prompt, content):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def read_llm_result(key):
+    result = llm_result_cache.get(key)
+    return result.decode('utf-8') if result is not None else None
+
+
+def get_cached_llm_result(key):
+    """Blocking SQLite reads and writes, call it through asyncio.to_thread."""
+    result = read_llm_result(key)
+    llm_result_cache.record("hits" if result is not None else "misses")
+    return result
+
+
+async def process_github_content(content, speech_prompt, max_tokens=None, listener=None):
+    print(content[-200:])
+
+    cache_key = llm_cache_key(content, speech_prompt)
+    cached_ssml = await asyncio.to_thread(get_cached_llm_result, cache_key)
+    if cached_ssml is not None:
+        return cached_ssml
+
+    return await llm_flight.run(
+        cache_key,
+        lambda: generate_ssml(content, speech_prompt, cache_key, max_tokens, listener),
+        lambda: read_llm_result(cache_key)
+    )
+
+
+async def generate_ssml(content, speech_prompt, cache_key, max_tokens=None, listener=None):
+    # Tokenizing a few hundred kB takes long enough to stall other requests
+    token_count = await asyncio.to_thread(token_estimator.count, content)
+    print(f"TOKEN COUNT: {token_count}")
+    if max_tokens and token_count > max_tokens:
+        return {
+            "error": "Content is too large for analysis."
+        }
+
+    ssml_response = await speech_service.generate_ssml_with_retry(content, speech_prompt, listener=listener)
+    print(ssml_response[-200:])
+
+    await asyncio.to_thread(llm_result_cache.set, cache_key, ssml_response.encode('utf-8'))
 
     return ssml_response
 
 
-def process_github_content_for_slides(content, slide_prompt, max_length, max_tokens=None):
-    content = content[:max_length]
+async def process_github_content_for_slides(content, slide_prompt, max_tokens=None):
     print(content[-200:])
 
-    try:
-        token_count = claude_service.count_tokens(content)
-        print(f"TOKEN COUNT: {token_count}")
-        if max_tokens and token_count > max_tokens:
-            return {
-                "error": "Content is too large for analysis."
-            }
-    except Exception as e:
-        print(f"{e} Error in token count")
+    cache_key = llm_cache_key(content, slide_prompt)
+    cached_markdown = await asyncio.to_thread(get_cached_llm_result, cache_key)
+    if cached_markdown is not None:
+        return cached_markdown
 
-    with NamedTemporaryFile(delete=False, mode='w+', suffix='.txt') as temp_file:
-        temp_file.write(content)
-        temp_file_path = temp_file.name
+    return await llm_flight.run(
+        cache_key,
+        lambda: generate_slide_markdown(content, slide_prompt, cache_key, max_tokens),
+        lambda: read_llm_result(cache_key)
+    )
 
-    try:
-        slide_markdown_response = slide_service.generate_markdown_with_retry([temp_file_path], slide_prompt)
-        print(slide_markdown_response[-200:])
-    finally:
-        os.remove(temp_file_path)
+
+async def generate_slide_markdown(content, slide_prompt, cache_key, max_tokens=None):
+    token_count = await asyncio.to_thread(token_estimator.count, content)
+    print(f"TOKEN COUNT: {token_count}")
+    if max_tokens and token_count > max_tokens:
+        return {
+            "error": "Content is too large for analysis."
+        }
+
+    slide_markdown_response = await slide_service.generate_markdown_with_retry(content, slide_prompt)
+    print(slide_markdown_response[-200:])
+
+    await asyncio.to_thread(llm_result_cache.set, cache_key, slide_markdown_response.encode('utf-8'))
 
     return slide_markdown_response
 
 
-def generate_ssml_concurrently(file_tree, readme, file_content, audio_length) -> str | dict:
+# Wraps the two halves of a long podcast into one script
+PODCAST_SPEAK_OPEN = '<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">'
+
+
+async def generate_ssml_concurrently(github_data, audio_length, stream_audio=False) -> str | dict:
+    """
+    Writes the podcast script. With `stream_audio`, the script is streamed
+    and its segments are synthesized while it is being written.
+    """
     # Prepare the content
     if audio_length == 'short':
-        combined_content = f"FILE TREE: {file_tree}\nREADME: {readme} IMPORTANT FILES: {file_content}"
-        ssml_response = process_github_content(combined_content, PODCAST_SSML_PROMPT, 250000, 100000)
+        packed = await asyncio.to_thread(pack_github_data, github_data)
+        combined_content = f"FILE TREE: {packed['file_tree']}\nREADME: {packed['readme']} IMPORTANT FILES: {packed['files']}"
+        listener = speech_service.segment_pipeline() if stream_audio and speech_service.available else None
+        ssml_response = await process_github_content(combined_content, PODCAST_SSML_PROMPT, 100000, listener)
         return ssml_response
     else:
-        combined_content_tree_readme = f"FILE TREE: {file_tree}\nREADME: {readme}"
-        combined_content_file_content = f"IMPORTANT FILES: {file_content}"
+        # Each half is its own LLM call with its own budget
+        packed_tree_readme = await asyncio.to_thread(pack_github_data, github_data, files=False)
+        packed_files = await asyncio.to_thread(pack_github_data, github_data, file_tree=False, readme=False)
+        combined_content_tree_readme = f"FILE TREE: {packed_tree_readme['file_tree']}\nREADME: {packed_tree_readme['readme']}"
+        combined_content_file_content = f"IMPORTANT FILES: {packed_files['files']}"
 
         # Define a function for error handling
         def check_response(response):
@@ -141,30 +309,39 @@ def generate_ssml_concurrently(file_tree, readme, file_content, audio_length) ->
                 return response
             return None
 
-        # Use ThreadPoolExecutor to execute tasks concurrently
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future_tree_readme = executor.submit(
-                process_github_content,
-                combined_content_tree_readme,
-                PODCAST_SSML_PROMPT_BEFORE_BREAK,
-                250000,
-                100000
-            )
-            future_file_content = executor.submit(
-                process_github_content,
-                combined_content_file_content,
-                PODCAST_SSML_PROMPT_AFTER_BREAK,
-                250000,
-                100000
+        # Only the first half is a known prefix of the final script, the
+        # second half's segments depend on where the first half ends
+        listener = None
+        if stream_audio and speech_service.available:
+            listener = speech_service.segment_pipeline(PODCAST_SPEAK_OPEN, flush_on_finish=False)
+
+        # Both halves are generated concurrently
+        try:
+            ssml_response_tree_readme, ssml_response_file_content = await asyncio.gather(
+                process_github_content(
+                    combined_content_tree_readme,
+                    PODCAST_SSML_PROMPT_BEFORE_BREAK,
+                    100000,
+                    listener
+                ),
+                process_github_content(
+                    combined_content_file_content,
+                    PODCAST_SSML_PROMPT_AFTER_BREAK,
+                    100000
+                )
             )
-
-            ssml_response_tree_readme = future_tree_readme.result()
-            ssml_response_file_content = future_file_content.result()
-
-            # Check for errors
-            error_response = check_response(ssml_response_tree_readme) or check_response(ssml_response_file_content)
-            if error_response:
-                return error_response
+        except BaseException:
+            # The first half's segments are useless without the second half
+            if listener is not None:
+                listener.cancel()
+            raise
+
+        # Check for errors
+        error_response = check_response(ssml_response_tree_readme) or check_response(ssml_response_file_content)
+        if error_response:
+            if listener is not None:
+                listener.cancel()
+            return error_response
         # Apply the function to remove the first occurrence of the <speak> tags from responses
         ssml_response_tree_readme_content = speech_service.remove_first_speak_tag(ssml_response_tree_readme)
         ssml_response_file_content_content = speech_service.remove_first_speak_tag(ssml_response_file_content)
@@ -172,7 +349,7 @@ def generate_ssml_concurrently(file_tree, readme, file_content, audio_length) ->
         combined_ssml_content = f"{ssml_response_tree_readme_content}\n{ssml_response_file_content_content}"
 
         # Wrap the combined content in a single <speak> tag
-        full_ssml_response = f'<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">{combined_ssml_content}</speak>'
+        full_ssml_response = f'{PODCAST_SPEAK_OPEN}{combined_ssml_content}</speak>'
 
         # Proceed with ssml_response_tree_readme and ssml_response_file_content as needed
         return full_ssml_response
@@ -196,6 +373,98 @@ class SlideRequest(BaseModel):
     audio_length: str = 'long'
 
 
+async def generate_podcast_ssml(username: str, repo: str, audio_length: str, stream_audio: bool = False) -> str | dict:
+    """
+    Fetches the repository and writes the podcast script. Returns SSML or an error dict.
+    With `stream_audio`, synthesis of the script starts while it is generated.
+    """
+    github_data = await get_cached_github_data(username, repo)
+
+    result = await generate_ssml_concurrently(github_data, audio_length, stream_audio)
+    # Check if there was an error response
+    if isinstance(result, dict):  # There was an error
+        print("Error in processing:")
+        for error in result.get("errors", []):
+            print(error)
+        return {"error": "Some error in genererating audio: E001"}
+
+    print(result[-100:])
+    return result
+
+
+def audio_duration(path: str) -> float:
+    """Duration of an mp3 in seconds from its frame headers; decodes with pydub only if that fails."""
+    with open(path, "rb") as audio_file:
+        duration = mp3.duration(audio_file.read())
+    if duration:
+        return duration
+    return len(AudioSegment.from_file(path, format="mp3")) / 1000.0
+
+
+async def synthesize_podcast(ssml_response: str) -> str | dict:
+    """Makes sure the mp3 and captions for this SSML are in the artifact store. Returns the artifact id or an error dict."""
+    artifact_id = artifact_store.artifact_id(ssml_response)
+
+    def lookup():
+        if all(artifact_store.exists(artifact_id, kind) for kind in ("mp3", "cues.json", "vtt")):
+            artifact_store.touch(artifact_id, "mp3")
+            return artifact_id
+        return None
+
+    async def synthesize():
+        boundaries = None
+        if not artifact_store.exists(artifact_id, "mp3"):
+            result = await speech_service.synthesize_with_boundaries(ssml_response)
+            if not result:
+                return {"error": "Text to speech is not available. Please set Azure speech credentials in .env E002"}
+            audio_bytes, boundaries = result
+            # Writes can also trigger an eviction walk over the artifacts directory
+            await asyncio.to_thread(artifact_store.write, artifact_id, "mp3", audio_bytes)
+
+        if boundaries:
+            cues = captions.boundary_cues(boundaries)
+        else:
+            # No boundary metadata, spread the words evenly over the audio instead
+            # Reads the whole file and may decode it with ffmpeg
+            duration_in_seconds = await asyncio.to_thread(audio_duration, artifact_store.path(artifact_id, "mp3"))
+            print("duration in sec", duration_in_seconds)
+            cues = captions.estimate_cues(ssml_response, duration_in_seconds)
+        # The cue list is the source for every caption format, the vtt is kept for the static artifact url
+        await asyncio.to_thread(artifact_store.write, artifact_id, "cues.json", captions.to_json(cues))
+        await asyncio.to_thread(artifact_store.write, artifact_id, "vtt", captions.to_webvtt(cues))
+        return artifact_id
+
+    return await synthesis_flight.run(artifact_id, synthesize, lookup)
+
+
+def artifact_url(artifact_id: str, kind: str) -> str:
+    return f"{router.prefix}/artifacts/{artifact_id}.{kind}"
+
+
+def captions_url(artifact_id: str, caption_format: str = "vtt") -> str:
+    return f"{router.prefix}/captions/{artifact_id}.{caption_format}"
+
+
+async def run_podcast_job(payload: dict) -> dict:
+    ssml_response = await generate_podcast_ssml(payload["username"], payload["repo"], payload["audio_length"], stream_audio=True)
+    if isinstance(ssml_response, dict):
+        raise Exception(ssml_response["error"])
+    artifact_id = await synthesize_podcast(ssml_response)
+    if isinstance(artifact_id, dict):
+        raise Exception(artifact_id["error"])
+    return {
+        "audio_url": artifact_url(artifact_id, "mp3"),
+        "vtt_url": captions_url(artifact_id, "vtt"),
+        "captions_url": captions_url(artifact_id, "json"),
+    }
+
+
+# Podcast jobs are queued in SQLite and run by a pool of workers in every process
+job_store = JobStore(stale_after=int(os.getenv("JOB_STALE_SECONDS", "120")),
+                     retention=float(os.getenv("JOB_RETENTION_HOURS", "24")) * 3600)
+job_pool = JobWorkerPool(job_store, {"podcast": run_podcast_job}, size=int(os.getenv("JOB_WORKERS", "2")))
+
+
 # @limiter.limit("1/minute;5/day") # TEMP: disable rate limit for growth??
 @router.post("")
 async def generate(request: Request, body: ApiRequest):
@@ -210,48 +479,30 @@ async def generate(request: Request, body: ApiRequest):
                 status_code=401,
                 detail="Please sign in to access this resource"
             )
-        github_data = get_cached_github_data(body.username, body.repo)
-        default_branch = github_data["default_branch"]
-        file_tree = github_data["file_tree"]
-        readme = github_data["readme"]
-        file_content = github_data["file_content"]
-
-        result = generate_ssml_concurrently(file_tree, readme, file_content, audio_length)
-        # Check if there was an error response
-        if isinstance(result, dict):  # There was an error
-            print("Error in processing:")
-            for error in result.get("errors", []):
-                print(error)
-            return {"error": "Some error in genererating audio: E001"}
-        else:
-            # Successful processing
-            full_ssml_response = result
-
-        print(full_ssml_response[-100:])
-        ssml_response = full_ssml_response
+        result = await generate_podcast_ssml(body.username, body.repo, audio_length, stream_audio=body.audio)
+        if isinstance(result, dict):
+            return result
+        ssml_response = result
 
         if not body.audio:
             return {"diagram": "flowchart TB\n    subgraph Input\n        CLI[CLI Interface]:::input\n        API[API Interface]:::input\n    end\n\n    subgraph Orchestration\n        TM[Task Manager]:::core\n        PR[Platform Router]:::core\n    end\n\n    subgraph \"Planning Layer\"\n        TP[Task Planning]:::core\n        subgraph Planners\n            OP[OpenAI Planner]:::planner\n            GP[Gemini Planner]:::planner\n            LP[Local Ollama Planner]:::planner\n        end\n    end\n\n    subgraph \"Finding Layer\"\n        subgraph Finders\n            OF[OpenAI Finder]:::finder\n            GF[Gemini Finder]:::finder\n            LF[Local Ollama Finder]:::finder\n            MF[MLX Finder]:::finder\n        end\n    end\n\n    subgraph \"Execution Layer\"\n        AE[Android Executor]:::executor\n        OE[OSX Executor]:::executor\n    end\n\n    subgraph \"External Services\"\n        direction TB\n        OAPI[OpenAI API]:::external\n        GAPI[Google Gemini API]:::external\n        LAPI[Local Ollama Instance]:::external\n    end\n\n    subgraph \"Platform Tools\"\n        direction TB\n        ADB[Android Debug Bridge]:::platform\n        OSX[OSX System Tools]:::platform\n    end\n\n    subgraph \"Configuration\"\n        direction TB\n        MS[Model Settings]:::config\n        FD[Function Declarations]:::config\n        SP[System Prompts]:::config\n    end\n\n    %% Connections\n    CLI --> TM\n    API --> TM\n    TM --> PR\n    PR --> TP\n    TP --> Planners\n    Planners --> Finders\n    Finders --> AE & OE\n    \n    %% External Service Connections\n    OP & OF -.-> OAPI\n    GP & GF -.-> GAPI\n    LP & LF -.-> LAPI\n    \n    %% Platform Tool Connections\n    AE --> ADB\n    OE --> OSX\n    \n    %% Configuration Connections\n    MS -.-> TM\n    FD -.-> PR\n    SP -.-> TP\n\n    %% Click Events\n    click CLI \"https://github.com/BandarLabs/clickclickclick/blob/main/main.py\"\n    click API \"https://github.com/BandarLabs/clickclickclick/blob/main/api.py\"\n    click MS \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/config/models.yaml\"\n    click FD \"https://github.com/BandarLabs/clickclickclick/tree/main/clickclickclick/config/function_declarations\"\n    click SP \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/config/prompts.yaml\"\n    click OP \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/planner/openai.py\"\n    click GP \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/planner/gemini.py\"\n    click LP \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/planner/local_ollama.py\"\n    click TP \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/planner/task.py\"\n    click OF \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/finder/openai.py\"\n    click GF \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/finder/gemini.py\"\n    click LF \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/finder/local_ollama.py\"\n    click MF \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/finder/mlx.py\"\n    click AE \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/executor/android.py\"\n    click OE \"https://github.com/BandarLabs/clickclickclick/blob/main/clickclickclick/executor/osx.py\"\n\n    %% Styles\n    classDef input fill:#87CEEB,stroke:#333,stroke-width:2px\n    classDef core fill:#4169E1,stroke:#333,stroke-width:2px\n    classDef planner fill:#6495ED,stroke:#333,stroke-width:2px\n    classDef finder fill:#4682B4,stroke:#333,stroke-width:2px\n    classDef executor fill:#1E90FF,stroke:#333,stroke-width:2px\n    classDef external fill:#98FB98,stroke:#333,stroke-width:2px\n    classDef platform fill:#FFA500,stroke:#333,stroke-width:2px\n    classDef config fill:#D3D3D3,stroke:#333,stroke-width:2px",
                     "explanation": 'EXPLANATION'}
         else:
+            artifact_id = await synthesize_podcast(ssml_response)
+            if isinstance(artifact_id, dict):
+                return artifact_id
+            response = FileResponse(
+                artifact_store.path(artifact_id, "mp3"),
+                media_type="audio/mpeg",
+                headers={"Content-Disposition": "attachment; filename=explanation.mp3"}
+            )
+            # Captions are fetched separately from their own cacheable endpoint
+            response.headers["X-Audio-Url"] = artifact_url(artifact_id, "mp3")
+            response.headers["X-Captions-Url"] = captions_url(artifact_id, "vtt")
 
-            audio_bytes = speech_service.text_to_mp3(ssml_response)
-
-            if audio_bytes:
-                response = Response(content=audio_bytes, media_type="audio/mpeg", headers={"Content-Disposition": "attachment; filename=explanation.mp3"})
-
-                audio = AudioSegment.from_file(io.BytesIO(audio_bytes), format="mp3")
-                duration_in_seconds = len(audio) / 1000.0
-                print("duration in sec", duration_in_seconds)
-                vtt_content = speech_service.ssml_to_webvtt(ssml_response, duration_in_seconds)
-                encoded_vtt_content = base64.b64encode(vtt_content.encode('utf-8')).decode('utf-8')
-                response.headers["X-VTT-Content"] = encoded_vtt_content
-
-                response.headers["Access-Control-Expose-Headers"] = "X-VTT-Content"
-                response.headers["Access-Control-Allow-Origin"] = "*"
-                return response
-            else:
-                return {"error": "Text to speech is not available. Please set Azure speech credentials in .env E002"}
+            response.headers["Access-Control-Expose-Headers"] = "X-Audio-Url, X-Captions-Url"
+            response.headers["Access-Control-Allow-Origin"] = "*"
+            return response
     except RateLimitError as e:
         raise HTTPException(
             status_code=429,
@@ -260,6 +511,113 @@ async def generate(request: Request, body: ApiRequest):
     except Exception as e:
         return {"error": str(e)}
 
+
+@router.post("/jobs", status_code=202)
+async def create_generation_job(request: Request, body: ApiRequest):
+    """Queues a podcast generation and returns immediately; poll the status url for the result."""
+    if len(body.instructions) > 1000:
+        raise HTTPException(
+            status_code=400,
+            detail="Instructions exceed maximum length of 1000 characters"
+        )
+
+    if body.audio_length == 'long' and not is_signed_in(request):
+        raise HTTPException(
+            status_code=401,
+            detail="Please sign in to access this resource"
+        )
+
+    job_id = job_store.create("podcast", {
+        "username": body.username,
+        "repo": body.repo,
+        "audio_length": body.audio_length,
+    })
+    job_pool.notify()
+    return {"job_id": job_id, "status": "queued", "status_url": f"{router.prefix}/jobs/{job_id}"}
+
+
+@router.get("/jobs/{job_id}")
+async def get_generation_job(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "result": job["result"],
+        "error": job["error"],
+    }
+
+
+@router.get("/artifacts/{artifact_id}.{kind}")
+async def get_artifact(request: Request, artifact_id: str, kind: str):
+    """Serves a stored mp3 or vtt file; Range requests get 206 partial content."""
+    if kind not in MEDIA_TYPES or not artifact_store.is_valid_id(artifact_id) or not artifact_store.exists(artifact_id, kind):
+        raise HTTPException(status_code=404, detail="Artifact not found")
+    artifact_store.touch(artifact_id, kind)
+
+    # Artifacts never change once written
+    headers = {"Cache-Control": "public, max-age=31536000, immutable", "Access-Control-Allow-Origin": "*"}
+    if ARTIFACTS_ACCEL_PREFIX:
+        # Let nginx send the file itself (sendfile, Range support) via an internal location
+        headers["X-Accel-Redirect"] = ARTIFACTS_ACCEL_PREFIX + artifact_store.relative_path(artifact_id, kind)
+        return Response(media_type=MEDIA_TYPES[kind], headers=headers)
+    return FileResponse(artifact_store.path(artifact_id, kind), media_type=MEDIA_TYPES[kind], headers=headers)
+
+
+@router.get("/captions/{artifact_id}.{caption_format}")
+async def get_captions(request: Request, artifact_id: str, caption_format: str):
+    """Serves the captions of a podcast as vtt, srt or json cues, gzipped when the client accepts it."""
+    if caption_format not in captions.FORMATS or not artifact_store.is_valid_id(artifact_id) \
+            or not artifact_store.exists(artifact_id, "cues.json"):
+        raise HTTPException(status_code=404, detail="Captions not found")
+    artifact_store.touch(artifact_id, "cues.json")
+
+    cue_data = artifact_store.read_bytes(artifact_id, "cues.json")
+    gzipped = accepts_gzip(request.headers.get("accept-encoding", ""))
+    # The gzip and identity bodies differ, so they get different ETags
+    etag = f'"{hashlib.sha256(cue_data).hexdigest()[:32]}-{caption_format}{"-gzip" if gzipped else ""}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "public, max-age=86400",
+        "Vary": "Accept-Encoding",
+        "Access-Control-Allow-Origin": "*",
+    }
+    if etag_matches(request.headers.get("if-none-match", ""), etag):
+        return Response(status_code=304, headers=headers)
+
+    render, media_type = captions.FORMATS[caption_format]
+    body = render(captions.from_json(cue_data)).encode("utf-8")
+    if gzipped:
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    """True if an Accept-Encoding header allows gzip; a q-value of 0 refuses it."""
+    qualities = {}
+    for entry in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in entry.split(";")]
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            qualities[coding.lower()] = quality
+    return qualities.get("gzip", qualities.get("x-gzip", qualities.get("*", 0.0))) > 0
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Compares an ETag with each entry of an If-None-Match header, weakly as that header requires."""
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
 @router.post("/slide")
 async def generate_slide(request: Request, body: SlideRequest):
     try:
@@ -273,12 +631,9 @@ async def generate_slide(request: Request, body: SlideRequest):
         #         status_code=401,
         #         detail="Please sign in to access this resource"
         #     )
-        github_data = get_cached_github_data(body.username, body.repo)
-        default_branch = github_data["default_branch"]
-        file_tree = github_data["file_tree"]
-        readme = github_data["readme"]
-        file_content = github_data["file_content"]
-        markdown = process_github_content_for_slides(f" file tree: {file_tree} \n contents: {file_content}", SLIDE_PROMPT, 250000, 100000)
+        github_data = await get_cached_github_data(body.username, body.repo)
+        packed = await asyncio.to_thread(pack_github_data, github_data, readme=False)
+        markdown = await process_github_content_for_slides(f" file tree: {packed['file_tree']} \n contents: {packed['files']}", SLIDE_PROMPT, 100000)
         return {"slide_markdown": markdown}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
@@ -288,13 +643,13 @@ async def generate_slide(request: Request, body: SlideRequest):
 async def get_generation_cost(request: Request, body: ApiRequest):
     try:
         # Get file tree and README content
-        github_data = get_cached_github_data(body.username, body.repo)
+        github_data = await get_cached_github_data(body.username, body.repo)
         file_tree = github_data["file_tree"]
         readme = github_data["readme"]
 
         # Calculate combined token count
-        file_tree_tokens = claude_service.count_tokens(file_tree)
-        readme_tokens = claude_service.count_tokens(readme)
+        file_tree_tokens = await asyncio.to_thread(token_estimator.count, file_tree)
+        readme_tokens = await asyncio.to_thread(token_estimator.count, readme)
 
         # Calculate approximate cost
         # Input cost: $3 per 1M tokens ($0.000003 per token)
@@ -0,0 +1,10 @@
+from fastapi import APIRouter, Request
+from app.core.cache import get_cache_stats
+
+router = APIRouter(prefix="/metrics", tags=["Metrics"])
+
+
+@router.get("/cache")
+async def cache_metrics(request: Request):
+    # Not routed by nginx (see nginx/api.conf), reachable from the host only
+    return get_cache_stats()
@@ -37,7 +37,7 @@ async def modify(request: Request, body: ModifyRequest):
         if body.repo in ["fastapi", "streamlit", "flask", "api-analytics", "monkeytype"]:
             return {"error": "Example repos cannot be modified"}
 
-        modified_mermaid_code = claude_service.call_claude_api(
+        modified_mermaid_code = await claude_service.call_claude_api(
             system_prompt=SYSTEM_MODIFY_PROMPT,
             data={
                 "instructions": body.instructions,
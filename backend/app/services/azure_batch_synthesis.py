@@ -0,0 +1,237 @@
+import asyncio
+import json
+import shutil
+import tempfile
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from typing import BinaryIO
+import httpx
+from app.core.http_client import get_http_client
+
+
+class BatchSynthesisError(Exception):
+    pass
+
+
+@dataclass
+class SynthesisResult:
+    """What a finished job produced besides the audio. Boundaries are dicts with
+    `text`, `offset` and `duration` (seconds), present only if requested."""
+    audio_file: str
+    words: list[dict] = field(default_factory=list)
+    sentences: list[dict] = field(default_factory=list)
+
+
+class BatchSynthesisClient:
+    """
+    Async client for the Azure Text to Speech batch synthesis API.
+
+    Each attempt submits a new job under a fresh id, polls it with a growing
+    interval (or the server's Retry-After) and gives up at an overall
+    deadline. The result zip is streamed into a spooled temporary file and
+    the audio is decompressed from it in chunks.
+
+    `endpoint` and `http_client` can point the client at a local fake of the
+    batch endpoint, e.g. an httpx.MockTransport (see the example below).
+    """
+    API_VERSION = "2024-04-01"
+    SPOOL_MAX_MEMORY = 8 * 1024 * 1024  # result zips above this spill to disk
+    CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, speech_key: str, speech_region: str | None = None, endpoint: str | None = None,
+                 http_client: httpx.AsyncClient | None = None, max_retries: int = 3, deadline: float = 900,
+                 poll_initial: float = 1.0, poll_max: float = 15.0, poll_factor: float = 1.5):
+        self.speech_key = speech_key
+        self.endpoint = endpoint or f"https://{speech_region}.api.cognitive.microsoft.com"
+        self._http_client = http_client
+        self.max_retries = max_retries
+        self.deadline = deadline
+        self.poll_initial = poll_initial
+        self.poll_max = poll_max
+        self.poll_factor = poll_factor
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        return self._http_client or get_http_client()
+
+    def _job_url(self, synthesis_id: str) -> str:
+        return f"{self.endpoint}/texttospeech/batchsyntheses/{synthesis_id}?api-version={self.API_VERSION}"
+
+    def _headers(self) -> dict:
+        return {
+            "Ocp-Apim-Subscription-Key": self.speech_key,
+            "Content-Type": "application/json"
+        }
+
+    async def synthesize(self, ssml: str, output: BinaryIO, properties: dict | None = None) -> SynthesisResult:
+        """
+        Synthesizes `ssml` and writes the audio file of the result to `output`.
+
+        Args:
+            ssml (str): The SSML document to synthesize
+            output (BinaryIO): Writable binary file receiving the audio
+            properties (dict | None): Overrides for the batch job properties
+
+        Returns:
+            SynthesisResult: The audio file name and any word / sentence boundaries.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.deadline
+        body = {
+            "description": "gitpodcast",
+            "inputKind": "SSML",
+            "inputs": [{"content": ssml}],
+            "properties": {
+                "outputFormat": "audio-16khz-32kbitrate-mono-mp3",
+                "wordBoundaryEnabled": False,
+                "sentenceBoundaryEnabled": False,
+                "concatenateResult": False,
+                "decompressOutputFiles": False,
+                **(properties or {})
+            }
+        }
+
+        last_error = None
+        for attempt in range(self.max_retries):
+            # A failed job is never resubmitted under its old id
+            synthesis_id = str(uuid.uuid4())
+            try:
+                download_url = await self._run_job(synthesis_id, body, deadline)
+                with tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_MEMORY) as archive:
+                    await self._download(download_url, archive, deadline)
+                    return await asyncio.to_thread(self._extract_result, archive, output)
+            except Exception as e:
+                last_error = e
+                print(f"Batch synthesis attempt {attempt + 1}/{self.max_retries} failed: {e}")
+            finally:
+                await self._delete_job(synthesis_id)
+
+            if loop.time() >= deadline:
+                break
+            output.seek(0)
+            output.truncate()
+            await asyncio.sleep(min(2 ** attempt, max(0.0, deadline - loop.time())))
+
+        raise BatchSynthesisError(f"Batch synthesis failed: {last_error}")
+
+    async def _run_job(self, synthesis_id: str, body: dict, deadline: float) -> str:
+        loop = asyncio.get_running_loop()
+        url = self._job_url(synthesis_id)
+        response = await self.http_client.put(url, headers=self._headers(), json=body)
+        response.raise_for_status()
+
+        interval = self.poll_initial
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise TimeoutError(f"Batch synthesis {synthesis_id} did not finish before the deadline")
+            await asyncio.sleep(min(self._retry_after(response, interval), remaining))
+            interval = min(interval * self.poll_factor, self.poll_max)
+
+            response = await self.http_client.get(url, headers=self._headers())
+            if response.status_code == 429:
+                continue
+            response.raise_for_status()
+            status = response.json()
+            operation_status = status.get("status")
+
+            if operation_status == "Succeeded":
+                return status["outputs"]["result"]
+            elif operation_status == "Failed":
+                raise BatchSynthesisError(f"Job {synthesis_id} failed: {status.get('properties', {}).get('error')}")
+            elif operation_status not in ["Running", "NotStarted"]:
+                raise BatchSynthesisError(f"Unexpected operation status: {operation_status}")
+
+    def _retry_after(self, response: httpx.Response, default: float) -> float:
+        try:
+            return min(float(response.headers["Retry-After"]), self.poll_max)
+        except (KeyError, ValueError):
+            return default
+
+    async def _download(self, url: str, archive: BinaryIO, deadline: float):
+        timeout = max(1.0, deadline - asyncio.get_running_loop().time())
+        # The result URL is pre-signed storage, it must not get the subscription key
+        async with self.http_client.stream("GET", url, timeout=timeout) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes(self.CHUNK_SIZE):
+                archive.write(chunk)
+        archive.seek(0)
+
+    def _extract_result(self, archive: BinaryIO, output: BinaryIO) -> SynthesisResult:
+        with zipfile.ZipFile(archive) as zip_file:
+            names = zip_file.namelist()
+            audio_file = next((name for name in names if name.endswith(".wav") or name.endswith(".mp3")), None)
+            if audio_file is None:
+                raise BatchSynthesisError("No audio file in batch synthesis result")
+            with zip_file.open(audio_file) as audio:
+                shutil.copyfileobj(audio, output, self.CHUNK_SIZE)
+            return SynthesisResult(
+                audio_file=audio_file,
+                words=self._read_boundaries(zip_file, names, ".word.json"),
+                sentences=self._read_boundaries(zip_file, names, ".sentence.json")
+            )
+
+    @staticmethod
+    def _read_boundaries(zip_file: zipfile.ZipFile, names: list[str], suffix: str) -> list[dict]:
+        name = next((name for name in names if name.endswith(suffix)), None)
+        if name is None:
+            return []
+        with zip_file.open(name) as boundary_file:
+            # Offsets and durations are in milliseconds
+            return [
+                {
+                    "text": boundary["Text"],
+                    "offset": boundary["AudioOffset"] / 1000.0,
+                    "duration": boundary["Duration"] / 1000.0
+                }
+                for boundary in json.load(boundary_file)
+            ]
+
+    async def _delete_job(self, synthesis_id: str):
+        # Finished jobs count against the account's job quota until deleted, so
+        # a failed delete is logged rather than raised over the job's own result
+        try:
+            response = await self.http_client.delete(self._job_url(synthesis_id), headers=self._headers())
+        except Exception as e:
+            print(f"Could not delete batch synthesis job {synthesis_id}: {e}")
+            return
+        # 404: the job was never created, e.g. when its submission failed
+        if not response.is_success and response.status_code != 404:
+            print(f"Could not delete batch synthesis job {synthesis_id}: {response.status_code}, {response.text[:200]}")
+
+
+# Example usage against a local fake of the batch endpoint
+if __name__ == "__main__":
+    import io
+
+    jobs = {}
+
+    def fake_batch_endpoint(request: httpx.Request) -> httpx.Response:
+        if request.url.host == "results.local":
+            archive = io.BytesIO()
+            with zipfile.ZipFile(archive, "w") as zip_file:
+                zip_file.writestr("0001.mp3", b"fake mp3 bytes")
+                zip_file.writestr("0001.word.json", json.dumps([{"Text": "Hi", "AudioOffset": 50, "Duration": 300}]))
+            return httpx.Response(200, content=archive.getvalue())
+        synthesis_id = request.url.path.rsplit("/", 1)[-1]
+        if request.method == "PUT":
+            jobs[synthesis_id] = 0
+            return httpx.Response(201, json={"id": synthesis_id, "status": "NotStarted"})
+        if request.method == "DELETE":
+            jobs.pop(synthesis_id, None)
+            return httpx.Response(204)
+        jobs[synthesis_id] += 1
+        if jobs[synthesis_id] < 3:
+            return httpx.Response(200, json={"status": "Running"}, headers={"Retry-After": "0.01"})
+        return httpx.Response(200, json={"status": "Succeeded", "outputs": {"result": "https://results.local/result.zip"}})
+
+    async def main():
+        fake_client = httpx.AsyncClient(transport=httpx.MockTransport(fake_batch_endpoint))
+        client = BatchSynthesisClient("fake-key", endpoint="https://speech.local", http_client=fake_client,
+                                      poll_initial=0.01)
+        output = io.BytesIO()
+        result = await client.synthesize("<speak></speak>", output)
+        print(result, output.getvalue(), json.dumps(jobs))
+
+    asyncio.run(main())
@@ -1,17 +1,33 @@
-from anthropic import Anthropic
+from anthropic import AsyncAnthropic
 from dotenv import load_dotenv
+from app.core.client_cache import ClientCache
 import os
 
 load_dotenv()
 
+# One client per process, so its keep-alive connection pool is reused by every request
+default_client = AsyncAnthropic()
+# Clients for custom API keys are copies of the default client and share its pool
+custom_clients = ClientCache(
+    lambda api_key: default_client.copy(api_key=api_key),
+    max_size=int(os.getenv("LLM_CLIENT_CACHE_SIZE", "64")),
+    idle_seconds=float(os.getenv("LLM_CLIENT_IDLE_SECONDS", "900"))
+)
+
+
+async def close_client():
+    """Closes the default Anthropic client, and with it the pool its per-key copies share."""
+    await default_client.close()
+
+
 class ClaudeService:
     def __init__(self):
-        self.default_client = Anthropic()
+        self.default_client = default_client
         # Load environment variables
         self.speech_key = os.environ.get("SPEECH_KEY")
         self.speech_region = os.environ.get("SPEECH_REGION")
 
-    def call_claude_api(self, system_prompt: str, data: dict, api_key: str | None = None) -> str:
+    async def call_claude_api(self, system_prompt: str, data: dict, api_key: str | None = None) -> str:
         """
         Makes an API call to Claude and returns the response.
 
@@ -27,9 +43,9 @@ class ClaudeService:
         user_message = self._format_user_message(data)
 
         # Use custom client if API key provided, otherwise use default
-        client = Anthropic(api_key=api_key) if api_key else self.default_client
+        client = custom_clients.get(api_key) if api_key else self.default_client
 
-        message = client.messages.create(
+        message = await client.messages.create(
             model="claude-3-5-sonnet-latest",
             max_tokens=4096,
             temperature=0,
@@ -70,7 +86,7 @@ class ClaudeService:
         return "\n\n".join(parts)
     # autopep8: on
 
-    def count_tokens(self, prompt: str) -> int:
+    async def count_tokens(self, prompt: str) -> int:
         """
         Counts the number of tokens in a prompt.
 
@@ -80,7 +96,7 @@ class ClaudeService:
         Returns:
             int: Number of input tokens
         """
-        response = self.default_client.messages.count_tokens(
+        response = await self.default_client.messages.count_tokens(
             model="claude-3-5-sonnet-latest",
             messages=[{
                 "role": "user",
@@ -1,4 +1,5 @@
 import os
+import tempfile
 import time
 from dotenv import load_dotenv
 import google.generativeai as genai
@@ -19,6 +20,21 @@ class GeminiService:
         print(f"Uploaded file '{file.display_name}' as: {file.uri}")
         return file
 
+    def upload_text_to_gemini(self, content):
+        """
+        Uploads text to Gemini. The File API only takes paths, so the chunks are
+        written to a temporary file that is removed once the upload is done.
+        """
+        with tempfile.NamedTemporaryFile("w", suffix=".txt", encoding="utf-8", delete=False) as temp_file:
+            if isinstance(content, str):
+                temp_file.write(content)
+            else:
+                temp_file.writelines(content)
+        try:
+            return self.upload_to_gemini(temp_file.name, mime_type="text/plain")
+        finally:
+            os.remove(temp_file.name)
+
     def wait_for_files_active(self, files):
         """
         Waits for the given files to be active.
@@ -40,18 +56,18 @@ class GeminiService:
         print("...all files ready")
         print()
 
-    def call_gemini_flash(self, file_paths, prompt, last_message="JUST GIVE SSML. Dont put formatting of backticks etc."):
+    def call_gemini_flash(self, content, prompt, last_message="JUST GIVE SSML. Dont put formatting of backticks etc."):
         """
         Calls the Gemini Flash API to generate SSML/markdown etc based on a given prompt.
 
         Args:
-            file_paths (list): List of paths to files to upload.
+            content (str | Iterable[str]): Text to analyze, as a string or chunks.
             ssml_prompt (str): SSML template or prompt to instruct the model.
 
         Returns:
             str: The generated SSML text.
         """
-        files = [self.upload_to_gemini(path, mime_type="text/plain") for path in file_paths]
+        files = [self.upload_text_to_gemini(content)]
 
         # Some files have a processing delay. Wait for them to be ready.
         self.wait_for_files_active(files)
@@ -91,7 +107,7 @@ class GeminiService:
 # Example usage
 if __name__ == "__main__":
     ssml_prompt = """Can you convert it into a podcast so that someone could listen to it and understand what's going on - make it a ssml similar to this: <speak version=\"1.0\" xmlns=\"http://www.w3.org/2001/10/synthesis\" xml:lang=\"en-US\">\n<voice name=\"en-US-AvaMultilingualNeural\">\nWelcome to Next Gen Innovators!  (no need to open links) .. also make it a conversation between host and guest of a podcast, question answer kind. \n\n<break time=\"500ms\" />\nI’m your host, Ava, and today we’re diving into an exciting topic: how students can embark on their entrepreneurial journey right from college.\n<break time=\"700ms\" />\nJoining us is Arun Sharma, a seasoned entrepreneur with over two decades of experience and a passion for mentoring young innovators.\n<break time=\"500ms\" />\nArun, it’s a pleasure to have you here.\n</voice>\n\n<voice name=\"en-US-BrianMultilingualNeural\">\n    Thank you, Ava.\n    <break time=\"300ms\" />\n    It’s great to be here. I’m excited to talk about how students can channel their creativity and energy into building impactful ventures.\n</voice> ..\n","""
-    file_paths = ["/Users/manish/Downloads/ahmedkhaleel2004-gitdiagram.txt"]
     gemini_service = GeminiService()
-    ssml_response = gemini_service.call_gemini_flash(file_paths, ssml_prompt)
+    with open("/Users/manish/Downloads/ahmedkhaleel2004-gitdiagram.txt") as file:
+        ssml_response = gemini_service.call_gemini_flash(file.read(), ssml_prompt)
     print(ssml_response)
\ No newline at end of file
@@ -1,14 +1,232 @@
-import requests
+import asyncio
 import jwt
+import re
+import tarfile
 import time
+import zlib
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 import os
 from base64 import b64decode
+from dataclasses import dataclass
+from app.core.http_client import get_http_client
+from app.core.cache import HttpResponseCache
+from app.core.path_filter import PathFilter, DEFAULT_EXCLUDE
+import httpx
 
 load_dotenv()
 
 
+@dataclass(frozen=True)
+class RepoSnapshot:
+    """A repository pinned to the head commit of its default branch."""
+    username: str
+    repo: str
+    branch: str
+    sha: str
+    size_kb: int | None = None  # repository size reported by GitHub, if known
+
+    @property
+    def cache_key(self) -> str:
+        """Stable key for anything derived from this exact commit."""
+        return f"{self.username}/{self.repo}@{self.sha}"
+
+
+README_PATTERN = re.compile(r'^readme(\.[a-z]+)?$', re.IGNORECASE)
+
+# GraphQL has no README lookup, so the usual names are probed in priority order
+README_CANDIDATES = ["README.md", "readme.md", "Readme.md", "README.rst", "README.txt", "README",
+                     "docs/README.md", ".github/README.md"]
+
+GRAPHQL_BATCH_SIZE = 50
+
+# URLs naming a full commit SHA address content that can never change
+COMMIT_SHA_PATTERN = re.compile(r'(?<![0-9a-f])[0-9a-f]{40}(?![0-9a-f])')
+
+# GitHub cuts the text of large blobs and sets isTruncated
+BLOB_FIELDS = "... on Blob { text isBinary isTruncated }"
+
+# Runs on every request, cache hits included, so it resolves the commit only
+SNAPSHOT_QUERY = """
+query($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    diskUsage
+    defaultBranchRef {
+      name
+      target {
+        oid
+      }
+    }
+  }
+}
+"""
+
+
+def blob_text(blob: dict | None) -> str | None:
+    """The text of a GraphQL Blob; None if it is missing, binary or truncated."""
+    if not blob or blob.get("text") is None or blob.get("isBinary") or blob.get("isTruncated"):
+        return None
+    return blob["text"]
+
+
+class _TarballReader:
+    """
+    Incremental reader for a gzipped tar stream. Compressed bytes are fed in as
+    they arrive; only the regular files accepted by `wanted` are buffered, every
+    other member is discarded block by block.
+    """
+    BLOCK_SIZE = 512
+
+    def __init__(self, wanted, max_file_size):
+        self._wanted = wanted
+        self._max_file_size = max_file_size
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self._buffer = bytearray()
+        self._member = None      # (kind, tar type, path) of the member being read
+        self._size = 0           # payload size of the current member
+        self._remaining = 0      # payload plus block padding still to consume
+        self._data = None        # payload collected so far, None when skipping
+        self._long_path = None   # path announced by a preceding pax/GNU header
+        self.finished = False
+
+    def feed(self, chunk):
+        """Consumes compressed bytes, returns the (path, bytes) files completed by them."""
+        self._buffer += self._decompressor.decompress(chunk)
+        completed = []
+        while not self.finished:
+            if self._member is not None:
+                if self._remaining:
+                    if not self._buffer:
+                        break
+                    take = min(self._remaining, len(self._buffer))
+                    if self._data is not None:
+                        keep = min(take, self._size - len(self._data))
+                        if keep > 0:
+                            self._data += self._buffer[:keep]
+                    del self._buffer[:take]
+                    self._remaining -= take
+                if not self._remaining:
+                    member = self._finish_member()
+                    if member:
+                        completed.append(member)
+                continue
+
+            if len(self._buffer) < self.BLOCK_SIZE:
+                break
+            header = bytes(self._buffer[:self.BLOCK_SIZE])
+            del self._buffer[:self.BLOCK_SIZE]
+            if not header.strip(b"\0"):
+                # A zero block marks the end of the archive
+                self.finished = True
+                break
+            self._start_member(tarfile.TarInfo.frombuf(header, "utf-8", "surrogateescape"))
+        return completed
+
+    def _start_member(self, info):
+        keep = False
+        path = None
+        if info.type in (tarfile.XHDTYPE, tarfile.GNUTYPE_LONGNAME):
+            kind, keep = "meta", True
+        elif info.isreg():
+            path = self._long_path or info.name
+            # GitHub nests everything under a single "<owner>-<repo>-<sha>/" directory
+            path = path.split("/", 1)[1] if "/" in path else ""
+            kind = "file"
+            keep = info.size <= self._max_file_size and self._wanted(path)
+        else:
+            kind = "skip"
+        if kind != "meta":
+            self._long_path = None
+
+        self._member = (kind, info.type, path)
+        self._size = info.size
+        self._remaining = -(-info.size // self.BLOCK_SIZE) * self.BLOCK_SIZE
+        self._data = bytearray() if keep else None
+
+    def _finish_member(self):
+        kind, tar_type, path = self._member  # type: ignore
+        data = self._data
+        self._member = None
+        self._data = None
+
+        if kind == "meta" and data is not None:
+            if tar_type == tarfile.GNUTYPE_LONGNAME:
+                self._long_path = bytes(data).rstrip(b"\0").decode("utf-8", "surrogateescape")
+            else:
+                self._long_path = self._parse_pax_path(bytes(data)) or self._long_path
+        elif kind == "file" and data is not None:
+            return path, bytes(data)
+        return None
+
+    @staticmethod
+    def _parse_pax_path(data):
+        # Records look like b"<length> <key>=<value>\n"
+        pos = 0
+        while pos < len(data):
+            space = data.find(b" ", pos)
+            if space == -1:
+                break
+            length = int(data[pos:space])
+            key, _, value = data[space + 1:pos + length - 1].partition(b"=")
+            if key == b"path":
+                return value.decode("utf-8", "surrogateescape")
+            pos += length
+        return None
+
+
+class _CompactTree:
+    """
+    File entries of a tree that is walked piece by piece. Each directory path
+    is stored once and files keep only (directory, name, size), instead of the
+    API's dicts with mode, sha and url, so very large trees stay small. Files
+    in directories `excludes_directory` rejects are not kept and do not count
+    against `max_entries`.
+    """
+
+    def __init__(self, max_entries, excludes_directory=None):
+        self.max_entries = max_entries
+        self._excludes_directory = excludes_directory
+        self.truncated = False   # True once max_entries was reached
+        self._directories = {}   # directory path -> index into _directory_paths, -1 if excluded
+        self._directory_paths = []
+        self._files = []         # (directory index, name, size)
+
+    def __len__(self):
+        return len(self._files)
+
+    @property
+    def full(self):
+        return len(self._files) >= self.max_entries
+
+    def add(self, directory, entries):
+        """Adds the blobs of a tree API listing, with paths relative to `directory`."""
+        for entry in entries:
+            if entry.get("type") != "blob":
+                continue
+            if self.full:
+                self.truncated = True
+                return
+            path = entry["path"]
+            slash = path.rfind("/")
+            parent = directory + path[:slash] if slash >= 0 else directory.rstrip("/")
+            index = self._directories.get(parent)
+            if index is None:
+                if self._excludes_directory is not None and self._excludes_directory(parent.lower()):
+                    index = -1
+                else:
+                    index = len(self._directory_paths)
+                    self._directory_paths.append(parent)
+                self._directories[parent] = index
+            if index >= 0:
+                self._files.append((index, path[slash + 1:], entry.get("size")))
+
+    def entries(self):
+        """Tree API style entries, sorted by directory, then name."""
+        paths = self._directory_paths
+        for index, name, size in sorted(self._files, key=lambda file: (paths[file[0]], file[1])):
+            yield {"path": f"{paths[index]}/{name}" if paths[index] else name, "type": "blob", "size": size}
+
+
 class GitHubService:
     def __init__(self):
         # Try app authentication first
@@ -25,6 +243,28 @@ class GitHubService:
 
         self.access_token = None
         self.token_expires_at = None
+        self._token_lock = asyncio.Lock()
+
+        # Upper bound on simultaneous file fetches for a single repository
+        self.fetch_concurrency = int(os.getenv("GITHUB_FETCH_CONCURRENCY", "8"))
+        # Fetching this many files or more reads one tarball instead of per-file requests
+        self.archive_threshold = int(os.getenv("GITHUB_ARCHIVE_THRESHOLD", "10"))
+        # Repositories larger than this (in KB) are never downloaded as a whole
+        self.archive_max_repo_kb = int(os.getenv("GITHUB_ARCHIVE_MAX_REPO_KB", "100000"))
+        # Files above this size are skipped, matching the contents API limit
+        self.max_file_size = 1024 * 1024
+        # Which tree entries reach the prompt; GITHUB_TREE_EXCLUDE adds comma separated rules
+        extra_rules = [rule.strip() for rule in os.getenv("GITHUB_TREE_EXCLUDE", "").split(",") if rule.strip()]
+        self.path_filter = PathFilter(DEFAULT_EXCLUDE + extra_rules, max_file_size=self.max_file_size)
+        # Trees GitHub truncates are walked subtree by subtree, this many requests at a time,
+        # until this many files were listed
+        self.tree_concurrency = int(os.getenv("GITHUB_TREE_CONCURRENCY", "8"))
+        self.tree_max_entries = int(os.getenv("GITHUB_TREE_MAX_ENTRIES", "300000"))
+        # auto, rest, archive or graphql; auto uses GraphQL whenever credentials allow it
+        self.fetch_mode = os.getenv("GITHUB_FETCH_MODE", "auto")
+
+        # Responses are kept with their ETags; 304 revalidations don't count against the rate limit
+        self.http_cache = HttpResponseCache(max_bytes=int(os.getenv("GITHUB_HTTP_CACHE_MB", "256")) * 1024 * 1024)
 
     # autopep8: off
     def _generate_jwt(self):
@@ -38,25 +278,26 @@ class GitHubService:
         return jwt.encode(payload, self.private_key, algorithm="RS256")  # type: ignore
     # autopep8: on
 
-    def _get_installation_token(self):
-        if self.access_token and self.token_expires_at > datetime.now():  # type: ignore
+    async def _get_installation_token(self):
+        # Concurrent requests share one refresh instead of each minting a token
+        async with self._token_lock:
+            if self.access_token and self.token_expires_at > datetime.now():  # type: ignore
+                return self.access_token
+
+            jwt_token = self._generate_jwt()
+            response = await get_http_client().post(
+                f"https://api.github.com/app/installations/{self.installation_id}/access_tokens",
+                headers={
+                    "Authorization": f"Bearer {jwt_token}",
+                    "Accept": "application/vnd.github+json"
+                }
+            )
+            data = response.json()
+            self.access_token = data["token"]
+            self.token_expires_at = datetime.now() + timedelta(hours=1)
             return self.access_token
 
-        jwt_token = self._generate_jwt()
-        response = requests.post(
-            f"https://api.github.com/app/installations/{
-                self.installation_id}/access_tokens",
-            headers={
-                "Authorization": f"Bearer {jwt_token}",
-                "Accept": "application/vnd.github+json"
-            }
-        )
-        data = response.json()
-        self.access_token = data["token"]
-        self.token_expires_at = datetime.now() + timedelta(hours=1)
-        return self.access_token
-
-    def _get_headers(self):
+    async def _get_headers(self):
         # If no credentials are available, return basic headers
         if not all([self.client_id, self.private_key, self.installation_id]) and not self.github_token:
             return {
@@ -71,123 +312,305 @@ class GitHubService:
             }
 
         # Otherwise use app authentication
-        token = self._get_installation_token()
+        token = await self._get_installation_token()
         return {
             "Authorization": f"Bearer {token}",
             "Accept": "application/vnd.github+json",
             "X-GitHub-Api-Version": "2022-11-28"
         }
 
-    def get_default_branch(self, username, repo):
-        """Get the default branch of the repository."""
+    def _is_authenticated(self):
+        return bool(self.github_token or all([self.client_id, self.private_key, self.installation_id]))
+
+    def _use_graphql(self):
+        # The GraphQL API rejects unauthenticated requests
+        return self.fetch_mode in ("auto", "graphql") and self._is_authenticated()
+
+    async def _graphql(self, query, variables):
+        """Runs a GraphQL query and returns its data, raising on any error."""
+        response = await get_http_client().post(
+            "https://api.github.com/graphql",
+            headers=await self._get_headers(),
+            json={"query": query, "variables": variables}
+        )
+        if response.status_code != 200:
+            raise Exception(f"GraphQL request failed: {response.status_code}, {response.text}")
+        payload = response.json()
+        if payload.get("errors"):
+            raise Exception(f"GraphQL request failed: {payload['errors']}")
+        return payload["data"]
+
+    async def _get(self, url, accept=None, cache=True, **kwargs):
+        """
+        GET a GitHub API url on the shared connection pool. Cached responses
+        are revalidated with If-None-Match / If-Modified-Since, and responses
+        pinned to a commit SHA are served from the cache without a request.
+        With `cache` False the response cache is neither read nor written, for
+        large one-off responses that would only evict the useful entries.
+        SQLite reads and writes run in a worker thread, off the event loop.
+        """
+        headers = await self._get_headers()
+        if accept:
+            headers["Accept"] = accept
+        client = get_http_client()
+        request = client.build_request("GET", url, headers=headers, **kwargs)
+        if not cache:
+            return await client.send(request)
+        key = f"{headers['Accept']} {request.url}"
+        immutable = bool(COMMIT_SHA_PATTERN.search(str(request.url)))
+
+        cached = await asyncio.to_thread(self.http_cache.lookup, key)
+        if cached:
+            meta, body = cached
+            if immutable:
+                await asyncio.to_thread(self.http_cache.record, "hits")
+                return self._cached_response(request, meta, body)
+            if meta.get("etag"):
+                request.headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request.headers["If-Modified-Since"] = meta["last_modified"]
+            await asyncio.to_thread(self.http_cache.record, "revalidations")
+
+        response = await client.send(request)
+        if response.status_code == 304 and cached:
+            await asyncio.to_thread(self.http_cache.record, "hits")
+            return self._cached_response(request, *cached)
+
+        await asyncio.to_thread(self.http_cache.record, "misses")
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if response.status_code == 200 and (etag or last_modified or immutable):
+            await asyncio.to_thread(self.http_cache.store, key, {
+                "etag": etag,
+                "last_modified": last_modified,
+                "content_type": response.headers.get("content-type")
+            }, response.content)
+        return response
+
+    @staticmethod
+    def _cached_response(request, meta, body):
+        headers = {"content-type": meta["content_type"]} if meta.get("content_type") else {}
+        return httpx.Response(200, headers=headers, content=body, request=request)
+
+    async def _get_repo_metadata(self, username, repo):
         api_url = f"https://api.github.com/repos/{username}/{repo}"
-        response = requests.get(api_url, headers=self._get_headers())
+        response = await self._get(api_url)
 
         if response.status_code == 200:
-            return response.json().get('default_branch')
+            return response.json()
         return None
 
-    def get_github_file_paths_as_list(self, username, repo):
+    async def get_repo_snapshot(self, username, repo):
         """
-        Fetches the file tree of an open-source GitHub repository,
-        excluding static files and generated code.
+        Resolves the default branch and its head commit once, so every later
+        read of the tree, README and files is pinned to the same commit.
 
         Args:
             username (str): The GitHub username or organization name
             repo (str): The repository name
 
         Returns:
-            str: A filtered and formatted string of file paths in the repository, one per line.
-        """
-        def should_include_file(path):
-            # Patterns to exclude
-            excluded_patterns = [
-                # Dependencies
-                'node_modules/', 'vendor/', 'venv/',
-                # Compiled files
-                '.min.', '.pyc', '.pyo', '.pyd', '.so', '.dll', '.class',
-                # Asset files
-                '.jpg', '.jpeg', '.png', '.gif', '.ico', '.svg', '.ttf', '.woff', '.webp',
-                # Cache and temporary files
-                '__pycache__/', '.cache/', '.tmp/',
-                # Lock files and logs
-                'yarn.lock', 'poetry.lock', '*.log',
-                # Configuration files
-                '.vscode/', '.idea/'
-            ]
-
-            return not any(pattern in path.lower() for pattern in excluded_patterns)
-
-        # Try to get the default branch first
-        branch = self.get_default_branch(username, repo)
-        if branch:
-            api_url = f"https://api.github.com/repos/{
-                username}/{repo}/git/trees/{branch}?recursive=1"
-            response = requests.get(api_url, headers=self._get_headers())
+            RepoSnapshot: The repository pinned to its current head commit.
+        """
+        if self._use_graphql():
+            try:
+                return await self._get_repo_snapshot_graphql(username, repo)
+            except Exception as e:
+                print(f"GraphQL snapshot failed: {e}. Falling back to REST.")
 
-            if response.status_code == 200:
-                data = response.json()
-                if "tree" in data:
-                    # Filter the paths and join them with newlines
-                    paths = [item['path'] for item in data['tree']
-                             if should_include_file(item['path'])]
-                    return "\n".join(paths)
-
-        # If default branch didn't work or wasn't found, try common branch names
-        for branch in ['main', 'master']:
-            api_url = f"https://api.github.com/repos/{
-                username}/{repo}/git/trees/{branch}?recursive=1"
-            response = requests.get(api_url, headers=self._get_headers())
+        metadata = await self._get_repo_metadata(username, repo) or {}
+        default_branch = metadata.get('default_branch')
+        # If default branch wasn't found, try common branch names
+        branches = [default_branch] if default_branch else ['main', 'master']
+
+        for branch in branches:
+            api_url = f"https://api.github.com/repos/{username}/{repo}/commits/{branch}"
+            response = await self._get(api_url, accept="application/vnd.github.sha")
 
             if response.status_code == 200:
-                data = response.json()
-                if "tree" in data:
-                    # Filter the paths and join them with newlines
-                    paths = [item['path'] for item in data['tree']
-                             if should_include_file(item['path'])]
-                    return "\n".join(paths)
+                return RepoSnapshot(username, repo, branch, response.text.strip(), metadata.get('size'))
 
         raise ValueError(
             "Could not fetch repository file tree. Repository might not exist, be empty or private.")
 
-    def get_github_readme(self, username, repo):
+    async def _get_repo_snapshot_graphql(self, username, repo):
+        data = await self._graphql(SNAPSHOT_QUERY, {"owner": username, "name": repo})
+        repository = data.get("repository")
+        if not repository or not repository.get("defaultBranchRef"):
+            raise ValueError("Repository not found or empty.")
+
+        branch_ref = repository["defaultBranchRef"]
+        return RepoSnapshot(username, repo, branch_ref["name"], branch_ref["target"]["oid"],
+                            repository.get("diskUsage"))
+
+    async def get_file_tree(self, snapshot):
+        """
+        Fetches the file tree of a repository, keeping only regular text files
+        that are not excluded by the path filter, too large, or marked as
+        generated or vendored in the repository's .gitattributes. Trees too large
+        for one recursive listing are walked subtree by subtree.
+
+        Args:
+            snapshot (RepoSnapshot): The repository pinned to a commit
+
+        Returns:
+            list[tuple[str, int | None]]: (path, size in bytes) of the included files, in tree order.
+        """
+        data = await self._get_tree(snapshot, snapshot.sha, recursive=True)
+        if data is None or "tree" not in data:
+            raise ValueError(
+                "Could not fetch repository file tree. Repository might not exist, be empty or private.")
+
+        entries = data["tree"]
+        if data.get("truncated"):
+            # Above about 100k entries GitHub cuts the recursive listing short
+            del data
+            entries = await self._walk_tree(snapshot)
+        path_filter = await self._repository_path_filter(snapshot, entries)
+        return [(entry["path"], entry.get("size")) for entry in path_filter.filter_tree(entries)]
+
+    async def _get_tree(self, snapshot, tree_sha, recursive=False, cache=True):
+        """The tree API response for a commit or tree SHA, or None if it could not be fetched."""
+        api_url = f"https://api.github.com/repos/{snapshot.username}/{snapshot.repo}/git/trees/{tree_sha}"
+        response = await self._get(api_url, cache=cache, params={"recursive": "1"} if recursive else None)
+        if response.status_code != 200:
+            print(f"Failed to fetch tree {tree_sha} of {snapshot.cache_key}: {response.status_code}")
+            return None
+        return response.json()
+
+    async def _walk_tree(self, snapshot):
+        """
+        Lists a tree too large for one recursive request. The root is listed
+        on its own, then every subtree is fetched recursively, at most
+        `tree_concurrency` at a time; subtrees that are truncated themselves
+        are split again one level down. Directories the path filter excludes
+        (node_modules/, vendor/, ...) are never fetched, and no new requests
+        start once `tree_max_entries` files were listed.
+
+        Args:
+            snapshot (RepoSnapshot): The repository pinned to a commit
+
+        Returns:
+            list[dict]: Blob entries (path, type, size), sorted by directory.
+        """
+        tree = _CompactTree(self.tree_max_entries, self.path_filter.excludes_directory)
+        semaphore = asyncio.Semaphore(max(1, self.tree_concurrency))
+        requests = 0
+
+        async def fetch(tree_sha, recursive):
+            nonlocal requests
+            async with semaphore:
+                if tree.full:
+                    return None
+                requests += 1
+                # Subtree listings are large and only needed for this walk, they stay out of the cache
+                return await self._get_tree(snapshot, tree_sha, recursive, cache=False)
+
+        async def expand(directory, entries):
+            tree.add(directory, entries)
+            subtrees = []
+            for entry in entries:
+                if entry.get("type") != "tree":
+                    continue
+                path = directory + entry["path"]
+                if not self.path_filter.excludes_directory(path.lower()):
+                    subtrees.append(walk(path + "/", entry["sha"]))
+            await asyncio.gather(*subtrees)
+
+        async def walk(directory, tree_sha):
+            data = await fetch(tree_sha, recursive=True)
+            if data is None:
+                return
+            if not data.get("truncated"):
+                tree.add(directory, data.get("tree", []))
+                return
+            del data
+            data = await fetch(tree_sha, recursive=False)
+            if data is not None:
+                await expand(directory, data.get("tree", []))
+
+        root = await fetch(snapshot.sha, recursive=False)
+        if root is not None:
+            await expand("", root.get("tree", []))
+        print(f"Walked truncated tree of {snapshot.cache_key}: {len(tree)} files in {requests} requests"
+              + (f", stopped at GITHUB_TREE_MAX_ENTRIES={tree.max_entries}" if tree.truncated else ""))
+        return list(tree.entries())
+
+    async def _repository_path_filter(self, snapshot, entries):
+        """The path filter extended with every .gitattributes file in the tree."""
+        attribute_paths = [
+            entry["path"] for entry in entries
+            if entry.get("type") == "blob" and (entry["path"] == ".gitattributes" or entry["path"].endswith("/.gitattributes"))
+        ]
+        if not attribute_paths:
+            return self.path_filter
+        files = await self.get_github_files_content(snapshot, attribute_paths[:20])
+        return self.path_filter.for_repository([
+            (path[:-len(".gitattributes")].rstrip("/"), text) for path, text in files if text is not None
+        ])
+
+    async def get_github_readme(self, snapshot):
         """
         Fetches the README contents of an open-source GitHub repository.
 
         Args:
-            username (str): The GitHub username or organization name
-            repo (str): The repository name
+            snapshot (RepoSnapshot): The repository pinned to a commit
 
         Returns:
             str: The contents of the README file.
         """
-        api_url = f"https://api.github.com/repos/{username}/{repo}/readme"
-        response = requests.get(api_url, headers=self._get_headers())
+        api_url = f"https://api.github.com/repos/{snapshot.username}/{snapshot.repo}/readme"
+        # The raw media type returns the file itself, no second download needed
+        response = await self._get(api_url, accept="application/vnd.github.raw", params={"ref": snapshot.sha})
 
         if response.status_code == 404:
             raise ValueError("Repository not found.")
         elif response.status_code != 200:
-            raise Exception(f"Failed to fetch README: {
-                            response.status_code}, {response.json()}")
+            raise Exception(f"Failed to fetch README: {response.status_code}, {response.text}")
 
-        data = response.json()
-        readme_content = requests.get(data['download_url']).text
-        return readme_content
+        return response.text
+
+    async def get_github_readme_graphql(self, snapshot):
+        """
+        Fetches the README with one GraphQL query. GraphQL has no README
+        lookup, so the usual names are probed and the first text file wins.
 
-    def get_github_file_content(self, username, repo, filepath):
+        Args:
+            snapshot (RepoSnapshot): The repository pinned to a commit
+
+        Returns:
+            str: The contents of the README file.
+        """
+        params = ", ".join(f"$e{i}: String!" for i in range(len(README_CANDIDATES)))
+        fields = "\n".join(f"    r{i}: object(expression: $e{i}) {{ {BLOB_FIELDS} }}" for i in range(len(README_CANDIDATES)))
+        query = f"query($owner: String!, $name: String!, {params}) {{\n  repository(owner: $owner, name: $name) {{\n{fields}\n  }}\n}}"
+        variables = {"owner": snapshot.username, "name": snapshot.repo}
+        variables.update({f"e{i}": f"{snapshot.sha}:{path}" for i, path in enumerate(README_CANDIDATES)})
+
+        repository = (await self._graphql(query, variables)).get("repository") or {}
+        for i in range(len(README_CANDIDATES)):
+            blob = repository.get(f"r{i}")
+            if blob and blob.get("isTruncated"):
+                break
+            readme = blob_text(blob)
+            if readme is not None:
+                return readme
+        # Other names, or too large for GraphQL: the REST endpoint finds it and returns it whole
+        return await self.get_github_readme(snapshot)
+
+    async def get_github_file_content(self, snapshot, filepath):
         """
         Fetches the contents of a file from an open-source GitHub repository.
 
         Args:
-            username (str): The GitHub username or organization name
-            repo (str): The repository name
+            snapshot (RepoSnapshot): The repository pinned to a commit
             filepath (str): The path to the file within the repository
 
         Returns:
             str: The contents of the specified file.
         """
-        api_url = f"https://api.github.com/repos/{username}/{repo}/contents/{filepath}"
-        response = requests.get(api_url, headers=self._get_headers())
+        api_url = f"https://api.github.com/repos/{snapshot.username}/{snapshot.repo}/contents/{filepath}"
+        response = await self._get(api_url, params={"ref": snapshot.sha})
 
         if response.status_code == 404:
             raise ValueError("File not found in the repository.")
@@ -196,4 +619,160 @@ class GitHubService:
 
         data = response.json()
         file_content = b64decode(data['content'].replace("\n", "")).decode('utf-8')
-        return file_content
\ No newline at end of file
+        return file_content
+
+    async def get_github_files_content(self, snapshot, filepaths, concurrency=None):
+        """
+        Fetches several files concurrently, at most `concurrency` at a time.
+
+        A file that fails to download does not affect the others; its error
+        is logged and its content is returned as None.
+
+        Args:
+            snapshot (RepoSnapshot): The repository pinned to a commit
+            filepaths (list[str]): Paths of the files within the repository
+            concurrency (int | None): Maximum in-flight requests, defaults to GITHUB_FETCH_CONCURRENCY
+
+        Returns:
+            list[tuple[str, str | None]]: (path, content) pairs in the order of `filepaths`.
+        """
+        semaphore = asyncio.Semaphore(max(1, concurrency or self.fetch_concurrency))
+
+        async def fetch(filepath):
+            async with semaphore:
+                try:
+                    return await self.get_github_file_content(snapshot, filepath)
+                except Exception as e:
+                    print(f"Failed to fetch {filepath}: {e}")
+                    return None
+
+        contents = await asyncio.gather(*(fetch(filepath) for filepath in filepaths))
+        return list(zip(filepaths, contents))
+
+    async def get_github_archive_files(self, snapshot, filepaths, include_readme=True):
+        """
+        Streams the tarball of the pinned commit once and extracts the given
+        files, decompressing as bytes arrive so the archive is never held in
+        memory. The download stops as soon as everything wanted has been seen.
+
+        Args:
+            snapshot (RepoSnapshot): The repository pinned to a commit
+            filepaths (list[str]): Paths of the files within the repository
+            include_readme (bool): Also extract a README from the repository root
+
+        Returns:
+            tuple[str | None, list[tuple[str, str | None]]]: The README (None if absent)
+            and (path, content) pairs in the order of `filepaths`.
+        """
+        wanted_paths = set(filepaths)
+
+        def wanted(path):
+            return path in wanted_paths or (include_readme and "/" not in path and bool(README_PATTERN.match(path)))
+
+        reader = _TarballReader(wanted, self.max_file_size)
+        found = {}
+        readmes = {}
+        api_url = f"https://api.github.com/repos/{snapshot.username}/{snapshot.repo}/tarball/{snapshot.sha}"
+        async with get_http_client().stream("GET", api_url, headers=await self._get_headers()) as response:
+            if response.status_code != 200:
+                raise Exception(f"Failed to fetch archive: {response.status_code}")
+
+            async for chunk in response.aiter_raw():
+                for path, data in reader.feed(chunk):
+                    try:
+                        text = data.decode('utf-8')
+                    except UnicodeDecodeError:
+                        continue
+                    if path in wanted_paths:
+                        found[path] = text
+                    if README_PATTERN.match(path):
+                        readmes[path] = text
+                if reader.finished or (len(found) == len(wanted_paths) and (readmes or not include_readme)):
+                    break
+
+        # Prefer README.md over other README variants, like GitHub does
+        readme = None
+        for path in sorted(readmes, key=lambda p: (not p.lower().endswith('.md'), p)):
+            readme = readmes[path]
+            break
+        return readme, [(filepath, found.get(filepath)) for filepath in filepaths]
+
+    async def get_github_files_content_graphql(self, snapshot, filepaths):
+        """
+        Fetches many files with GraphQL, one `object(expression: "<sha>:<path>")`
+        per file, batched so that a typical request needs a single round trip.
+
+        Args:
+            snapshot (RepoSnapshot): The repository pinned to a commit
+            filepaths (list[str]): Paths of the files within the repository
+
+        Returns:
+            list[tuple[str, str | None]]: (path, content) pairs in the order of `filepaths`,
+            None for missing, binary or oversized files.
+        """
+        contents = {}
+        for start in range(0, len(filepaths), GRAPHQL_BATCH_SIZE):
+            batch = filepaths[start:start + GRAPHQL_BATCH_SIZE]
+            # Paths go in as variables so they never need escaping inside the query
+            params = ", ".join(f"$e{i}: String!" for i in range(len(batch)))
+            fields = "\n".join(f"    f{i}: object(expression: $e{i}) {{ {BLOB_FIELDS} }}" for i in range(len(batch)))
+            query = f"query($owner: String!, $name: String!, {params}) {{\n  repository(owner: $owner, name: $name) {{\n{fields}\n  }}\n}}"
+            variables = {"owner": snapshot.username, "name": snapshot.repo}
+            variables.update({f"e{i}": f"{snapshot.sha}:{path}" for i, path in enumerate(batch)})
+
+            data = await self._graphql(query, variables)
+            repository = data.get("repository") or {}
+            for i, path in enumerate(batch):
+                text = blob_text(repository.get(f"f{i}"))
+                if text is not None:
+                    contents[path] = text
+                else:
+                    print(f"Failed to fetch {path}: not found, not a text file or truncated.")
+
+        return [(filepath, contents.get(filepath)) for filepath in filepaths]
+
+    async def get_readme_and_files(self, snapshot, filepaths):
+        """
+        Fetches the README and the given files. With credentials both come
+        from batched GraphQL queries run concurrently; otherwise it chooses between
+        per-file requests and a single archive download by how many files
+        are needed. GITHUB_FETCH_MODE forces a specific strategy.
+
+        Args:
+            snapshot (RepoSnapshot): The repository pinned to a commit
+            filepaths (list[str]): Paths of the files within the repository
+
+        Returns:
+            tuple[str, list[tuple[str, str | None]]]: The README and (path, content)
+            pairs in the order of `filepaths`.
+        """
+        if self._use_graphql():
+            try:
+                readme, files = await asyncio.gather(
+                    self.get_github_readme_graphql(snapshot),
+                    self.get_github_files_content_graphql(snapshot, filepaths)
+                )
+                return readme, files
+            except Exception as e:
+                print(f"GraphQL fetch failed: {e}. Falling back to REST.")
+
+        use_archive = self.fetch_mode == "archive" or (
+            self.fetch_mode == "auto"
+            and len(filepaths) >= self.archive_threshold
+            and (snapshot.size_kb is None or snapshot.size_kb <= self.archive_max_repo_kb)
+        )
+        if use_archive:
+            try:
+                readme, files = await self.get_github_archive_files(snapshot, filepaths)
+                if readme is None:
+                    # The README may live in docs/ or .github/, let the API find it
+                    readme = await self.get_github_readme(snapshot)
+                return readme, files
+            except Exception as e:
+                print(f"Archive fetch failed: {e}. Falling back to per-file requests.")
+
+        readme, files = await asyncio.gather(
+            self.get_github_readme(snapshot),
+            self.get_github_files_content(snapshot, filepaths)
+        )
+        return readme, files
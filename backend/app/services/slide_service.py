@@ -1,8 +1,6 @@
 from dotenv import load_dotenv
 
-from app.services.openai_service import OpenAIService
-
-from io import BytesIO
+from app.services.openai_service import OpenAIService, join_content
 
 load_dotenv()
 
@@ -15,11 +13,13 @@ class SlideService:
         return True
 
     # Function to generate SSML with retry logic
-    def generate_markdown_with_retry(self, file_paths, prompt, max_retries=3, delay=2):
+    async def generate_markdown_with_retry(self, content, prompt, max_retries=3, delay=2):
+        # Chunk iterators can only be read once, every attempt sends the same text
+        content = join_content(content)
         attempts = 0
         while attempts < max_retries:
             # Call the OpenAI function to generate SSML
-            markdown_response = openai_service.call_openai_for_response(file_paths, prompt)
+            markdown_response = await openai_service.call_openai_for_response(content, prompt)
             filtered_markdown_response = '\n'.join(line for line in markdown_response.split('\n'))
 
 
@@ -1,20 +1,23 @@
 from dotenv import load_dotenv
+import asyncio
+import json
 import azure.cognitiveservices.speech as speechsdk
-from app.services.openai_service import OpenAIService
+from app.services.openai_service import OpenAIService, join_content
 import os
 import re
-import textwrap
 import xml.etree.ElementTree as ET
-import time
-import requests
-import uuid
-import zipfile
 from io import BytesIO
+from app.core import mp3
+from app.core.ssml_stream import SPEAK_OPEN_PATTERN, VOICE_BLOCK_PATTERN, VoiceBlockParser
+from app.core.artifacts import ArtifactStore
+from app.core.cache import get_cache_path
+from app.services.azure_batch_synthesis import BatchSynthesisClient
 
 load_dotenv()
 
 openai_service = OpenAIService()
 
+
 class MemoryStreamCallback(speechsdk.audio.PushAudioOutputStreamCallback):
     def __init__(self):
         super().__init__()
@@ -36,169 +39,152 @@ class SpeechService:
         # Load environment variables
         self.speech_key = os.environ.get("SPEECH_KEY")
         self.speech_region = os.environ.get("SPEECH_REGION")
+        self.speech_endpoint = os.getenv("SPEECH_ENDPOINT")
+        self.segment_chars = int(os.getenv("SPEECH_SEGMENT_CHARS", "5000"))
+        self.segment_concurrency = int(os.getenv("SPEECH_SEGMENT_CONCURRENCY", "4"))
+        self.segment_store = ArtifactStore(
+            get_cache_path("segments"),
+            max_bytes=int(os.getenv("SPEECH_SEGMENT_CACHE_MB", "1024")) * 1024 * 1024
+        )
+        # segment id -> {"future": synthesis task, "waiters": callers awaiting it}
+        self._segments_in_flight: dict[str, dict] = {}
+        # Bounds the Azure batch jobs of this worker, streamed prefetches included
+        self.segment_semaphore = asyncio.Semaphore(self.segment_concurrency)
+        self.batch_client = BatchSynthesisClient(
+            self.speech_key,
+            self.speech_region,
+            endpoint=self.speech_endpoint,
+            deadline=float(os.getenv("SPEECH_SYNTHESIS_DEADLINE", "900"))
+        )
+
+    def split_ssml(self, ssml_string: str, max_chars: int | None = None) -> list[str]:
+        """
+        Splits an SSML document at <voice> boundaries into standalone documents
+        of about `max_chars` each. Voice blocks are never cut, so a block longer
+        than `max_chars` becomes a segment of its own.
+
+        Args:
+            ssml_string (str): SSML with a <speak> root and <voice> children
+            max_chars (int | None): Target segment size, defaults to SPEECH_SEGMENT_CHARS
 
-    def text_to_mp3(self, ssml_string: str) -> bytes | None:
+        Returns:
+            list[str]: The segments in order, or the input itself if it has no voice blocks
+        """
+        max_chars = max_chars or self.segment_chars
+        speak_match = SPEAK_OPEN_PATTERN.search(ssml_string)
+        voices = VOICE_BLOCK_PATTERN.findall(ssml_string)
+        if speak_match is None or not voices:
+            return [ssml_string]
+
+        speak_open = speak_match.group(0)
+        grouper = SegmentGrouper(max_chars)
+        segments = [segment for segment in map(grouper.add, voices) if segment]
+        segments.append(grouper.flush())
+        return [speak_open + "".join(segment) + "</speak>" for segment in segments]
+
+    @property
+    def available(self) -> bool:
+        """True if speech credentials are configured."""
+        return bool(self.speech_key and (self.speech_region or self.speech_endpoint))
+
+    def segment_pipeline(self, speak_open: str | None = None, flush_on_finish: bool = True) -> "SegmentPipeline":
+        """A listener for generate_ssml_with_retry that synthesizes segments while the script streams in."""
+        return SegmentPipeline(self, speak_open, flush_on_finish)
+
+    async def synthesize_with_boundaries(self, ssml_string: str) -> tuple[bytes, dict | None] | None:
         """
-        Converts a string to an mp3 bytes object using Azure Text to Speech Batch Synthesis API.
+        Synthesizes SSML to mp3 together with its word and sentence boundaries.
+
+        The SSML is split into segments which are synthesized concurrently and
+        joined at MP3 frame boundaries. Each segment's audio is cached under the
+        hash of its SSML, so a script that shares segments with an earlier one
+        only synthesizes the segments that changed. Boundary offsets are shifted
+        by the length of the segments before them.
 
         Args:
             ssml_string (str): Text to be converted to speech
 
         Returns:
-            bytes | None: Returns mp3 bytes object, None if error
+            tuple[bytes, dict | None] | None: The mp3 bytes and {"words": [...], "sentences": [...]}
+            (None if some segment has no boundaries), or None if synthesis failed
         """
+        if not self.available:
+            return None
 
-        MAX_RETRIES = 3
-        RETRY_DELAY = 2
-
-        if not self.speech_key or not self.speech_region:
+        segments = self.split_ssml(ssml_string)
+        # Finished segments stay cached even if another one fails, so a retry resumes
+        results = await asyncio.gather(*(self._synthesize_segment(segment) for segment in segments),
+                                       return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            print(f"Exception occurred: {len(errors)}/{len(segments)} segments failed: {errors[0]}")
             return None
 
-        synthesis_id = str(uuid.uuid4())
-        put_url = f"https://{self.speech_region}.api.cognitive.microsoft.com/texttospeech/batchsyntheses/{synthesis_id}?api-version=2024-04-01"
-
-        headers = {
-            "Ocp-Apim-Subscription-Key": self.speech_key,
-            "Content-Type": "application/json"
-        }
-
-        body = {
-            "description": "my ssml test",
-            "inputKind": "SSML",
-            "inputs": [
-                {"content": ssml_string}
-            ],
-            "properties": {
-                "outputFormat": "audio-16khz-32kbitrate-mono-mp3",
-                "wordBoundaryEnabled": False,
-                "sentenceBoundaryEnabled": False,
-                "concatenateResult": False,
-                "decompressOutputFiles": False
-            }
-        }
-
-        for attempt in range(MAX_RETRIES):
-            try:
-                put_response = requests.put(put_url, headers=headers, json=body)
-                put_response.raise_for_status()
-
-                # Polling operation status
-                status_url = f"https://{self.speech_region}.api.cognitive.microsoft.com/texttospeech/batchsyntheses/{synthesis_id}?api-version=2024-04-01"
-                while True:
-                    time.sleep(RETRY_DELAY)
-                    status_response = requests.get(status_url, headers=headers)
-                    status_response.raise_for_status()
-                    status = status_response.json()
-                    operation_status = status.get("status")
-
-                    if operation_status == "Succeeded":
-                        download_url = status["outputs"]["result"]
-                        zip_response = requests.get(download_url)
-                        zip_response.raise_for_status()
-
-                        # Extract .wav file from zip
-                        with zipfile.ZipFile(BytesIO(zip_response.content)) as zip_file:
-                            for file_name in zip_file.namelist():
-                                if file_name.endswith(".wav") or file_name.endswith(".mp3"):
-                                    with zip_file.open(file_name) as audio_file:
-                                        audio_content = audio_file.read()
-
-                                        # # Save the file locally
-                                        # with open(file_name, 'wb') as local_file:
-                                        #     local_file.write(audio_content)
-
-                                        return audio_content
-                    elif operation_status == "Failed":
-                        raise Exception("Batch synthesis failed")
-                    elif operation_status in ["Running", "NotStarted"]:
-                        continue
-                    else:
-                        raise Exception(f"Unexpected operation status: {operation_status}")
-
-            except Exception as e:
-                print(f"Exception occurred: {str(e)}")
-                if attempt < MAX_RETRIES - 1:
-                    print(f"Retrying... (attempt {attempt + 1}/{MAX_RETRIES})")
-                    time.sleep(RETRY_DELAY)
-                else:
-                    return None
-
-    def calculate_duration(self, text_line, wpm=135):
-        words = len(text_line.split())
-        minutes = words / wpm
-        seconds = minutes * 60
-        return seconds
-
-    def no_of_words(self, text_lines):
-        if isinstance(text_lines, str):  # If it's a single string
-            return len([word for word in text_lines.split() if word])
-        elif isinstance(text_lines, list):  # If it's a list of strings
-            return sum(len([word for word in line.split() if word]) for line in text_lines)
-        else:
-            return 0
-
-    def ssml_to_webvtt(self, ssml_content, duration_in_seconds, max_line_length=45, max_words_per_cue=30):
-        # Helper function to insert line breaks at appropriate places
-        def add_line_breaks(text, max_length):
-            words = text.split()
-            lines, current_line = [], ""
-            for word in words:
-                # Check if adding the next word exceeds the length limit
-                if len(current_line) + len(word) + 1 > max_length:
-                    lines.append(current_line)
-                    current_line = word
-                else:
-                    current_line += (" " if current_line else "") + word
-            if current_line:  # Add the remainder of the text if any
-                lines.append(current_line)
-            return "\n".join(lines)
-
-        # Step 1: Extract text from SSML, remove specific tags, and empty lines
-        text_content = re.sub(r'<speak[^>]*>|</speak>|<break[^>]*>', '', ssml_content)
-        text_content = re.sub(r'<voice[^>]*>', '\n\n', text_content)
-        text_content = re.sub(r'</voice>', '', text_content)
-        text_content = re.sub(r'<emphasis[^>]*>|</emphasis>', '', text_content)
-        text_lines = list(filter(None, [line.strip() for line in text_content.splitlines()]))
-
-        # Step 2: Generate WebVTT content with sequential timestamps
-        vtt_content = textwrap.dedent("""\
-            WEBVTT
-
-            """)
-        cumulative_time = 0.0
-        cue_index = 0
-        wpm = int(self.no_of_words(text_lines) / duration_in_seconds * 60)
-        print(wpm, " Words per minute")
-        for i, line in enumerate(text_lines):
-
-            # Break the line if it's too long into sub-lines based on word count
-            words = line.split()
-            sub_lines = []
-            for j in range(0, len(words), max_words_per_cue):
-                sub_line = ' '.join(words[j:j + max_words_per_cue])
-                sub_lines.append(sub_line)
-
-            # Generate VTT for each sub-line
-            for sub_line in sub_lines:
-                duration = self.calculate_duration(sub_line, wpm=wpm)
-                start_time = cumulative_time
-                end_time = start_time + duration
-                cumulative_time = end_time  # Update cumulative time for next line
-
-                # Convert seconds to VTT timestamp format (HH:MM:SS.mmm)
-                def seconds_to_timestamp(seconds):
-                    hours = int(seconds // 3600)
-                    minutes = int((seconds % 3600) // 60)
-                    seconds = seconds % 60
-                    return f"{hours:02}:{minutes:02}:{seconds:06.3f}"
-
-                formatted_sub_line = add_line_breaks(sub_line, max_line_length)
-                cue_index += 1
-                vtt_content += f"{cue_index}\n"
-                vtt_content += f"{seconds_to_timestamp(start_time)} --> {seconds_to_timestamp(end_time)} line:5% align:center\n"
-                vtt_content += f"{formatted_sub_line}\n\n"
-
-        return vtt_content
+        parts = []
+        boundaries = {"words": [], "sentences": []}
+        segment_start = 0.0
+        for audio, segment_boundaries in results:
+            frames = mp3.audio_frames(audio)
+            if segment_boundaries is None:
+                boundaries = None
+            elif boundaries is not None:
+                for kind in ("words", "sentences"):
+                    boundaries[kind].extend(
+                        {**boundary, "offset": boundary["offset"] + segment_start}
+                        for boundary in segment_boundaries[kind]
+                    )
+            parts.append(frames)
+            segment_start += mp3.duration(frames) or 0.0
+        return b"".join(parts), boundaries
+
+    async def _synthesize_segment(self, segment_ssml: str) -> tuple[bytes, dict | None]:
+        # A segment started early from the LLM stream is awaited, not synthesized twice
+        segment_id = self.segment_store.artifact_id(segment_ssml)
+        in_flight = self._segments_in_flight.get(segment_id)
+        if in_flight is None:
+            future = asyncio.ensure_future(self._load_or_synthesize_segment(segment_id, segment_ssml))
+            in_flight = self._segments_in_flight[segment_id] = {"future": future, "waiters": 0}
+            future.add_done_callback(lambda _: self._segments_in_flight.pop(segment_id, None))
+        in_flight["waiters"] += 1
+        try:
+            return await asyncio.shield(in_flight["future"])
+        except asyncio.CancelledError:
+            # Nobody else wants this segment, stop paying for it
+            if in_flight["waiters"] == 1:
+                in_flight["future"].cancel()
+            raise
+        finally:
+            in_flight["waiters"] -= 1
+
+    async def prefetch_segment(self, segment_ssml: str):
+        try:
+            await self._synthesize_segment(segment_ssml)
+        except Exception as e:
+            # synthesize_with_boundaries retries it once the script is complete
+            print(f"Early synthesis of a segment failed: {e}")
+
+    async def _load_or_synthesize_segment(self, segment_id: str, segment_ssml: str) -> tuple[bytes, dict | None]:
+        if self.segment_store.exists(segment_id, "mp3"):
+            boundaries = None
+            if self.segment_store.exists(segment_id, "boundaries.json"):
+                boundaries = json.loads(self.segment_store.read_text(segment_id, "boundaries.json"))
+            self.segment_store.touch(segment_id, "mp3")
+            return self.segment_store.read_bytes(segment_id, "mp3"), boundaries
+
+        output = BytesIO()
+        async with self.segment_semaphore:
+            result = await self.batch_client.synthesize(
+                segment_ssml,
+                output,
+                properties={"wordBoundaryEnabled": True, "sentenceBoundaryEnabled": True}
+            )
+        audio = output.getvalue()
+        boundaries = None
+        if result.words or result.sentences:
+            boundaries = {"words": result.words, "sentences": result.sentences}
+            await asyncio.to_thread(self.segment_store.write, segment_id, "boundaries.json", json.dumps(boundaries))
+        await asyncio.to_thread(self.segment_store.write, segment_id, "mp3", audio)
+        return audio, boundaries
 
         # Function to remove the first occurrence of the <speak> tag using regex
     def remove_first_speak_tag(self, content):
@@ -249,18 +235,48 @@ class SpeechService:
             # In case of parsing errors, simply return the original SSML
             return ssml
 
+    # Function to drop markdown fences from LLM output and sanitize it
+    def clean_llm_ssml(self, ssml_response: str) -> str:
+        filtered_ssml_response = '\n'.join(line for line in ssml_response.split('\n') if '```' not in line)
+        return self.sanitize_ssml(filtered_ssml_response)
+
     # Function to generate SSML with retry logic
-    def generate_ssml_with_retry(self, file_paths, prompt, max_retries=3, delay=2):
+    async def generate_ssml_with_retry(self, content, prompt, max_retries=3, delay=2, listener=None):
+        """
+        Generates the podcast script. With a `listener` (see segment_pipeline)
+        the completion is streamed and fed to it as it arrives; the returned
+        SSML is the same either way.
+        """
+        # Chunk iterators can only be read once, every attempt sends the same text
+        content = join_content(content)
+        try:
+            return await self._generate_ssml(content, prompt, max_retries, listener)
+        except BaseException:
+            # The segments started so far belong to a script that is never synthesized
+            if listener is not None:
+                listener.cancel()
+            raise
+
+    async def _generate_ssml(self, content, prompt, max_retries, listener):
         attempts = 0
         while attempts < max_retries:
             # Call the OpenAI function to generate SSML
-            ssml_response = openai_service.call_openai_for_response(file_paths, prompt)
-            filtered_ssml_response = '\n'.join(line for line in ssml_response.split('\n') if '```' not in line)
+            if listener is None:
+                ssml_response = await openai_service.call_openai_for_response(content, prompt)
+            else:
+                listener.start_attempt()
+                chunks = []
+                async for chunk in openai_service.stream_openai_response(content, prompt):
+                    chunks.append(chunk)
+                    listener.feed(chunk)
+                ssml_response = "".join(chunks).strip()
             # Sanitize the SSML
-            sanitized_ssml = self.sanitize_ssml(filtered_ssml_response)
+            sanitized_ssml = self.clean_llm_ssml(ssml_response)
 
             # Check if the sanitized SSML is valid
             if self.is_valid_ssml(sanitized_ssml):
+                if listener is not None:
+                    listener.finish()
                 return sanitized_ssml
 
             # If not valid, increment attempts and wait before retrying
@@ -270,3 +286,87 @@ class SpeechService:
         raise ValueError("Failed to generate valid SSML after multiple attempts.")
 
 
+class SegmentGrouper:
+    """Greedily packs voice blocks into segments of about `max_chars`, one block at a time."""
+
+    def __init__(self, max_chars: int):
+        self.max_chars = max_chars
+        self._current: list[str] = []
+        self._size = 0
+
+    def add(self, voice: str) -> list[str] | None:
+        """Adds a block and returns the previous segment if this block closed it."""
+        finished = None
+        if self._current and self._size + len(voice) > self.max_chars:
+            finished = self.flush()
+        self._current.append(voice)
+        self._size += len(voice)
+        return finished
+
+    def flush(self) -> list[str]:
+        finished, self._current, self._size = self._current, [], 0
+        return finished
+
+
+class SegmentPipeline:
+    """
+    Starts synthesizing the podcast while the LLM is still writing it.
+
+    Fed streamed SSML on the event loop, it cleans each finished <voice>
+    block the way the finished script is cleaned, packs the blocks into the
+    segments split_ssml will cut the final script into, and schedules every
+    completed segment as a task. Synthesizing the final script then
+    finds those segments in the segment cache or still in flight. Blocks are
+    only predictions: if the final script differs, the unmatched segments are
+    simply synthesized again.
+
+    `speak_open` fixes the <speak> tag of the segments when the streamed text
+    becomes part of a larger script; `flush_on_finish` is False when more
+    voice blocks follow it there, so its last segment is still open.
+    """
+
+    def __init__(self, speech_service: SpeechService, speak_open: str | None = None, flush_on_finish: bool = True):
+        self.speech_service = speech_service
+        self.speak_open = speak_open
+        self.flush_on_finish = flush_on_finish
+        self.scheduled: list[str] = []
+        self.tasks: list[asyncio.Task] = []
+        self.start_attempt()
+
+    def start_attempt(self):
+        # A retried generation starts a new script, the last one's segments are not needed
+        self.cancel()
+        self._parser = VoiceBlockParser()
+        self._grouper = SegmentGrouper(self.speech_service.segment_chars)
+        self._segment_open = None
+
+    def feed(self, chunk: str):
+        for raw_voice in self._parser.feed(chunk):
+            cleaned = self.speech_service.clean_llm_ssml(self._parser.speak_open + raw_voice + "</speak>")
+            speak_match = SPEAK_OPEN_PATTERN.search(cleaned)
+            if speak_match is None or not self.speech_service.is_valid_ssml(cleaned):
+                continue
+            self._segment_open = self.speak_open or speak_match.group(0)
+            for voice in VOICE_BLOCK_PATTERN.findall(cleaned):
+                segment = self._grouper.add(voice)
+                if segment:
+                    self._schedule(segment)
+
+    def finish(self):
+        if self.flush_on_finish:
+            segment = self._grouper.flush()
+            if segment:
+                self._schedule(segment)
+
+    def cancel(self):
+        """Stops synthesizing the segments scheduled so far."""
+        for task in self.tasks:
+            task.cancel()
+        self.tasks = []
+        self.scheduled = []
+
+    def _schedule(self, voices: list[str]):
+        segment_ssml = self._segment_open + "".join(voices) + "</speak>"
+        self.scheduled.append(segment_ssml)
+        # Keep a reference, the loop holds only weak references to tasks
+        self.tasks.append(asyncio.ensure_future(self.speech_service.prefetch_segment(segment_ssml)))
@@ -0,0 +1,120 @@
+"""
+Throughput of the caption engine on a synthetic podcast script.
+
+Run from the backend directory:
+    python -m benchmarks.captions_benchmark [--words 50000] [--repeat 5]
+"""
+import argparse
+import random
+import re
+import time
+from app.core import captions
+
+VOICES = ["en-US-AvaMultilingualNeural", "en-US-DustinMultilingualNeural"]
+VOCABULARY = "the repo uses a service layer so requests go through routers into services and the cache keeps results umm".split()
+
+
+def make_script(word_count: int, seed: int = 0) -> tuple[str, dict]:
+    """An SSML script of about `word_count` words and matching synthetic word / sentence boundaries."""
+    rng = random.Random(seed)
+    blocks, words, sentences = [], [], []
+    offset, written, turn = 0.0, 0, 0
+    while written < word_count:
+        block = []
+        for _ in range(rng.randint(1, 4)):
+            sentence = [rng.choice(VOCABULARY) for _ in range(rng.randint(6, 40))]
+            sentence_start = offset
+            for word in sentence:
+                duration = 0.08 + 0.03 * len(word)
+                words.append({"text": word, "offset": offset, "duration": duration})
+                offset += duration + 0.05
+            words.append({"text": ".", "offset": offset, "duration": 0.0})
+            sentences.append({"text": " ".join(sentence) + ".", "offset": sentence_start, "duration": offset - sentence_start})
+            offset += 0.4
+            written += len(sentence)
+            block.append(" ".join(sentence).capitalize() + ". <break time=\"300ms\" />")
+        blocks.append(f'<voice name="{VOICES[turn % 2]}">\n' + "\n".join(block) + "\n</voice>")
+        turn += 1
+    ssml = '<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" xml:lang="en-US">\n' + "\n".join(blocks) + "\n</speak>"
+    return ssml, {"words": words, "sentences": sentences}
+
+
+def legacy_ssml_to_webvtt(ssml_content, duration_in_seconds, max_line_length=45, max_words_per_cue=30):
+    """The previous implementation (four re.sub passes, string +=, per-cue helper definitions), for comparison."""
+    def add_line_breaks(text, max_length):
+        lines, current_line = [], ""
+        for word in text.split():
+            if len(current_line) + len(word) + 1 > max_length:
+                lines.append(current_line)
+                current_line = word
+            else:
+                current_line += (" " if current_line else "") + word
+        if current_line:
+            lines.append(current_line)
+        return "\n".join(lines)
+
+    text_content = re.sub(r'<speak[^>]*>|</speak>|<break[^>]*>', '', ssml_content)
+    text_content = re.sub(r'<voice[^>]*>', '\n\n', text_content)
+    text_content = re.sub(r'</voice>', '', text_content)
+    text_content = re.sub(r'<emphasis[^>]*>|</emphasis>', '', text_content)
+    text_lines = list(filter(None, [line.strip() for line in text_content.splitlines()]))
+    vtt_content = "WEBVTT\n\n"
+    cumulative_time = 0.0
+    cue_index = 0
+    wpm = int(sum(len([word for word in line.split() if word]) for line in text_lines) / duration_in_seconds * 60)
+    for line in text_lines:
+        words = line.split()
+        for j in range(0, len(words), max_words_per_cue):
+            sub_line = ' '.join(words[j:j + max_words_per_cue])
+            duration = len(sub_line.split()) / wpm * 60
+            start_time = cumulative_time
+            end_time = start_time + duration
+            cumulative_time = end_time
+
+            def seconds_to_timestamp(seconds):
+                hours = int(seconds // 3600)
+                minutes = int((seconds % 3600) // 60)
+                seconds = seconds % 60
+                return f"{hours:02}:{minutes:02}:{seconds:06.3f}"
+
+            cue_index += 1
+            vtt_content += f"{cue_index}\n"
+            vtt_content += f"{seconds_to_timestamp(start_time)} --> {seconds_to_timestamp(end_time)} line:5% align:center\n"
+            vtt_content += f"{add_line_breaks(sub_line, max_line_length)}\n\n"
+    return vtt_content
+
+
+def measure(label: str, word_count: int, repeat: int, function):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    best = min(timings)
+    print(f"{label:<32} {best * 1000:9.1f} ms   {word_count / best / 1e6:7.2f} M words/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, default=50000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    ssml, boundaries = make_script(args.words)
+    word_count = len(boundaries["words"]) - len(boundaries["sentences"])
+    duration = boundaries["words"][-1]["offset"]
+    estimated = captions.estimate_cues(ssml, duration)
+    from_boundaries = captions.boundary_cues(boundaries)
+    print(f"{word_count} words, {len(ssml)} chars of SSML, {len(estimated)} estimated / {len(from_boundaries)} boundary cues\n")
+
+    measure("legacy ssml_to_webvtt", word_count, args.repeat, lambda: legacy_ssml_to_webvtt(ssml, duration))
+    measure("estimate_cues + to_webvtt", word_count, args.repeat, lambda: captions.to_webvtt(captions.estimate_cues(ssml, duration)))
+    measure("estimate_cues", word_count, args.repeat, lambda: captions.estimate_cues(ssml, duration))
+    measure("boundary_cues", word_count, args.repeat, lambda: captions.boundary_cues(boundaries))
+    measure("to_webvtt", word_count, args.repeat, lambda: captions.to_webvtt(from_boundaries))
+    measure("to_srt", word_count, args.repeat, lambda: captions.to_srt(from_boundaries))
+    measure("to_json", word_count, args.repeat, lambda: captions.to_json(from_boundaries))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Compares the local important-file ranker with the LLM's picks.
+
+Evaluation runs offline over recorded cases, one JSON object per line with
+"repo", "file_tree" (newline separated paths) and "llm_files". For every
+case it prints how many of the LLM's files the ranker picked in its top 10,
+how many its hybrid shortlist contains, and how long ranking took.
+
+Cases are recorded once from saved file trees (needs the Azure OpenAI
+settings in .env). Run from the backend directory:
+    python -m benchmarks.file_ranker_eval --record cases.jsonl tree1.txt [tree2.txt ...]
+    python -m benchmarks.file_ranker_eval cases.jsonl [--shortlist 30]
+    python -m benchmarks.file_ranker_eval --synthetic 100000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from app.core.file_ranker import rank_important_files
+
+
+async def record(output_path: str, tree_paths: list[str]):
+    from app.services.openai_service import OpenAIService
+
+    openai_service = OpenAIService()
+    with open(output_path, "a", encoding="utf-8") as output:
+        for tree_path in tree_paths:
+            with open(tree_path, encoding="utf-8") as tree_file:
+                file_tree = tree_file.read()
+            llm_files = await openai_service.get_important_files(file_tree)
+            repo = os.path.splitext(os.path.basename(tree_path))[0]
+            output.write(json.dumps({"repo": repo, "file_tree": file_tree, "llm_files": llm_files}) + "\n")
+            print(f"{repo}: {llm_files}")
+
+
+def evaluate(cases_path: str, shortlist_size: int):
+    print(f"{'repo':<32} {'paths':>7} {'llm':>4} {'top10':>6} {'short':>6} {'ms':>7}")
+    top10_recalls, shortlist_recalls = [], []
+    with open(cases_path, encoding="utf-8") as cases:
+        for line in cases:
+            case = json.loads(line)
+            paths = case["file_tree"].splitlines()
+            known = set(paths)
+            # Picks the LLM made up cannot be matched by any ranker
+            llm_files = [path for path in case["llm_files"] if path in known]
+            if not llm_files:
+                continue
+
+            start = time.perf_counter()
+            shortlist = rank_important_files(paths, limit=shortlist_size)
+            elapsed = (time.perf_counter() - start) * 1000
+            top10 = rank_important_files(paths)
+
+            top10_hits = len(set(top10) & set(llm_files))
+            shortlist_hits = len(set(shortlist) & set(llm_files))
+            top10_recalls.append(top10_hits / len(llm_files))
+            shortlist_recalls.append(shortlist_hits / len(llm_files))
+            print(f"{case['repo'][-32:]:<32} {len(paths):>7} {len(llm_files):>4} "
+                  f"{top10_hits:>6} {shortlist_hits:>6} {elapsed:>7.1f}")
+
+    if top10_recalls:
+        print(f"\nmean share of LLM picks in local top 10: {statistics.mean(top10_recalls):.0%}, "
+              f"in local top {shortlist_size}: {statistics.mean(shortlist_recalls):.0%}")
+
+
+def synthetic(count: int):
+    """Ranking time for a generated monorepo-like tree of `count` paths."""
+    rng = random.Random(0)
+    roots = ["src", "lib", "packages", "services", "tests", "docs", "examples", "tools", "vendor"]
+    extensions = ["py", "ts", "tsx", "go", "rs", "json", "md", "png", "yaml", "lock"]
+    paths = ["package.json", "README.md", "docs/architecture.md"] + [
+        f"{rng.choice(roots)}/m{rng.randint(0, 400)}/{rng.choice(['core', 'api', 'util', 'internal'])}"
+        f"/f{i}.{rng.choice(extensions)}"
+        for i in range(count)
+    ]
+    timings = []
+    for _ in range(5):
+        start = time.perf_counter()
+        picks = rank_important_files(paths)
+        timings.append((time.perf_counter() - start) * 1000)
+    print(picks)
+    print(f"{len(paths)} paths: median {statistics.median(timings):.0f} ms over {len(timings)} runs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("cases", nargs="?", help="JSONL file of recorded cases")
+    parser.add_argument("--record", nargs="+", metavar=("CASES", "TREE"), help="Record LLM picks for file trees")
+    parser.add_argument("--shortlist", type=int, default=30, help="Shortlist size used by hybrid mode")
+    parser.add_argument("--synthetic", type=int, metavar="PATHS", help="Time the ranker on a generated tree")
+    args = parser.parse_args()
+
+    if args.record:
+        asyncio.run(record(args.record[0], args.record[1:]))
+    elif args.synthetic:
+        synthetic(args.synthetic)
+    elif args.cases:
+        evaluate(args.cases, args.shortlist)
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
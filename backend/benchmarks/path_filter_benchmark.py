@@ -0,0 +1,102 @@
+"""
+Times the compiled path filter against the old per-path substring checks on
+a generated tree of 200k entries, and lists where their decisions differ.
+
+Runs offline. From the backend directory:
+    python -m benchmarks.path_filter_benchmark [--entries 200000]
+"""
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+from app.core.path_filter import PathFilter
+
+
+def legacy_should_include_file(path):
+    # The filter get_github_file_paths_as_list used before PathFilter
+    excluded_patterns = [
+        'node_modules/', 'vendor/', 'venv/',
+        '.min.', '.pyc', '.pyo', '.pyd', '.so', '.dll', '.class',
+        '.jpg', '.jpeg', '.png', '.gif', '.ico', '.svg', '.ttf', '.woff', '.webp',
+        '__pycache__/', '.cache/', '.tmp/',
+        'yarn.lock', 'poetry.lock', '*.log',
+        '.vscode/', '.idea/'
+    ]
+    return not any(pattern in path.lower() for pattern in excluded_patterns)
+
+
+def generate_tree(count: int, seed: int = 0) -> list[dict]:
+    """Tree API entries for a monorepo-like layout, directories included."""
+    rng = random.Random(seed)
+    roots = ["src", "packages", "services", "node_modules", "vendor", "dist", "docs", "tests", ".idea", "assets"]
+    names = ["index", "main", "util", "sorting", "solver", "api", "schema", "bundle.min", "model"]
+    extensions = ["py", "ts", "js", "go", "json", "md", "png", "svg", "pyc", "log", "pb.go", "pdf", "so", "lock"]
+    entries = []
+    directories = set()
+    while len(entries) < count:
+        directory = f"{rng.choice(roots)}/m{rng.randint(0, 500)}/{rng.choice(['lib', 'core', 'gen', 'Cache'])}"
+        if directory not in directories:
+            directories.add(directory)
+            entries.append({"path": directory, "type": "tree"})
+        size = int(rng.lognormvariate(8, 2))
+        entries.append({
+            "path": f"{directory}/{rng.choice(names)}{len(entries)}.{rng.choice(extensions)}",
+            "type": "blob",
+            "size": size,
+        })
+    return entries[:count]
+
+
+def best_of(function, runs: int = 5) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, default=200_000)
+    args = parser.parse_args()
+
+    entries = generate_tree(args.entries)
+    path_filter = PathFilter(max_file_size=1024 * 1024)
+    with_attributes = path_filter.for_repository([
+        ("", "dist/** linguist-generated\n*.pb.go linguist-generated=true\n"),
+        ("packages", "**/gen/** linguist-vendored\n"),
+    ])
+
+    legacy_kept = [entry for entry in entries if legacy_should_include_file(entry["path"])]
+    kept = path_filter.filter_tree(entries)
+    kept_with_attributes = with_attributes.filter_tree(entries)
+
+    print(f"{len(entries)} entries, median of 5 runs")
+    print(f"{'filter':<34} {'ms':>8} {'kept':>8}")
+    print(f"{'legacy substring checks':<34} "
+          f"{best_of(lambda: [e for e in entries if legacy_should_include_file(e['path'])]):>8.1f} {len(legacy_kept):>8}")
+    print(f"{'compiled filter':<34} {best_of(lambda: path_filter.filter_tree(entries)):>8.1f} {len(kept):>8}")
+    print(f"{'compiled filter + .gitattributes':<34} "
+          f"{best_of(lambda: with_attributes.filter_tree(entries)):>8.1f} {len(kept_with_attributes):>8}")
+
+    # Everything the legacy filter kept but the new one drops, by reason
+    kept_paths = {entry["path"] for entry in kept}
+    reasons = Counter()
+    for entry in legacy_kept:
+        if entry["path"] in kept_paths:
+            continue
+        if entry["type"] != "blob":
+            reasons["directory"] += 1
+        elif entry["size"] > path_filter.max_file_size:
+            reasons["larger than 1 MB"] += 1
+        else:
+            reasons["rule ." + entry["path"].rsplit(".", 1)[-1]] += 1
+    newly_kept = [entry["path"] for entry in kept if not legacy_should_include_file(entry["path"])]
+    print("\nkept before, dropped now:", dict(reasons.most_common()))
+    print(f"dropped before, kept now: {len(newly_kept)} {newly_kept[:3]}")
+
+
+if __name__ == "__main__":
+    main()
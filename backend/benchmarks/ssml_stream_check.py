@@ -0,0 +1,139 @@
+"""
+Checks streamed podcast generation against the non-streaming path with a
+fake LLM stream and a fake batch synthesis client, and shows how much of
+the synthesis time overlaps with generation.
+
+The script, audio and captions must come out identical, and every segment
+the stream started early must be one the final script needs, synthesized
+exactly once. Runs offline. From the backend directory:
+    python -m benchmarks.ssml_stream_check [--voices 24] [--token-delay 0.002] [--tts-delay 0.3]
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import tempfile
+import time
+
+# Offline run: dummy credentials and a throwaway segment cache
+os.environ.setdefault("AZURE_OPENAI_ENDPOINT", "https://example.invalid")
+os.environ.setdefault("AZURE_OPENAI_API_KEY", "unused")
+os.environ["SPEECH_KEY"] = "unused"
+os.environ["SPEECH_REGION"] = "local"
+os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="gitpodcast-stream-check-")
+
+from app.core.artifacts import ArtifactStore  # noqa: E402
+from app.services import speech_service as speech_module  # noqa: E402
+from app.services.azure_batch_synthesis import SynthesisResult  # noqa: E402
+
+FRAME_HEADER = bytes([0xFF, 0xF3, 0x48, 0xC0])  # MPEG-2 layer III, 32 kbps, 16 kHz, mono
+
+
+def fake_script(voice_count: int, seed: int = 0) -> str:
+    """LLM-style output: markdown fences, uneven whitespace, entities and a stray top-level break."""
+    rng = random.Random(seed)
+    voices = ["en-US-AvaMultilingualNeural", "en-US-DustinMultilingualNeural"]
+    blocks = []
+    for i in range(voice_count):
+        sentences = " ".join(
+            f"Sentence {i}.{j} about the repo &amp; its {rng.choice(['router', 'cache', 'service'])}."
+            for j in range(rng.randint(2, 12))
+        )
+        blocks.append(f'<voice name="{voices[i % 2]}">\n    {sentences}\n    <break time="300ms" />\n  Umm, right.</voice>')
+    return (
+        "```xml\n<speak version=\"1.0\" xmlns=\"http://www.w3.org/2001/10/synthesis\" xml:lang=\"en-US\">\n"
+        + "\n\n".join(blocks[:2]) + '\n<break time="500ms"/>\n' + "\n\n".join(blocks[2:]) + "\n</speak>\n```\n"
+    )
+
+
+class FakeLLM:
+    def __init__(self, script: str, token_delay: float):
+        self.script = script
+        self.token_delay = token_delay
+
+    async def stream_openai_response(self, content, prompt_text):
+        rng = random.Random(1)
+        position = 0
+        while position < len(self.script):
+            size = rng.randint(1, 12)
+            await asyncio.sleep(self.token_delay)
+            yield self.script[position:position + size]
+            position += size
+
+    async def call_openai_for_response(self, content, prompt_text):
+        return "".join([chunk async for chunk in self.stream_openai_response(content, prompt_text)]).strip()
+
+
+class FakeBatchClient:
+    """Audio and boundaries derived from the segment text, after a fixed delay."""
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.synthesized: list[str] = []
+
+    async def synthesize(self, ssml, output, properties=None):
+        self.synthesized.append(ssml)
+        await asyncio.sleep(self.delay)
+        words = ssml.split()
+        digest = hashlib.sha256(ssml.encode("utf-8")).digest()
+        output.write(b"".join(FRAME_HEADER + digest * 4 + bytes(12) for _ in range(len(words))))
+        return SynthesisResult(
+            audio_file="0001.mp3",
+            words=[{"text": word, "offset": i * 0.036, "duration": 0.03} for i, word in enumerate(words)],
+            sentences=[{"text": ssml, "offset": 0.0, "duration": len(words) * 0.036}],
+        )
+
+
+async def run(speech_service, llm, stream: bool):
+    start = time.perf_counter()
+    if stream:
+        listener = speech_service.segment_pipeline()
+        ssml = await speech_service.generate_ssml_with_retry("repo", "prompt", listener=listener)
+    else:
+        listener = None
+        ssml = await speech_service.generate_ssml_with_retry("repo", "prompt")
+    generated = time.perf_counter()
+    audio, boundaries = await speech_service.synthesize_with_boundaries(ssml)
+    done = time.perf_counter()
+    return ssml, audio, boundaries, listener, generated - start, done - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--voices", type=int, default=24)
+    parser.add_argument("--token-delay", type=float, default=0.002)
+    parser.add_argument("--tts-delay", type=float, default=0.3)
+    parser.add_argument("--segment-chars", type=int, default=1500)
+    args = parser.parse_args()
+
+    llm = FakeLLM(fake_script(args.voices), args.token_delay)
+    speech_module.openai_service = llm
+    speech_service = speech_module.SpeechService()
+    speech_service.segment_chars = args.segment_chars
+
+    results = {}
+    for stream in (False, True):
+        # Fresh segment cache and client, so each run synthesizes everything itself
+        speech_service.segment_store = ArtifactStore(tempfile.mkdtemp(prefix="segments-"))
+        speech_service.batch_client = FakeBatchClient(args.tts_delay)
+        results[stream] = (*await run(speech_service, llm, stream), speech_service.batch_client.synthesized)
+
+    plain_ssml, plain_audio, plain_boundaries, _, plain_generated, plain_total, plain_jobs = results[False]
+    ssml, audio, boundaries, listener, generated, total, jobs = results[True]
+    segments = speech_service.split_ssml(ssml)
+
+    assert ssml == plain_ssml, "streamed script differs"
+    assert audio == plain_audio, "streamed audio differs"
+    assert boundaries == plain_boundaries, "streamed boundaries differ"
+    assert listener.scheduled == segments, "early segments do not match the final split"
+    assert sorted(jobs) == sorted(segments), "a segment was synthesized twice or not at all"
+
+    print(f"{len(segments)} segments, {len(ssml)} chars of SSML: script, audio and boundaries identical")
+    print(f"{'':<14} {'script ready':>12} {'audio ready':>12}")
+    print(f"{'non-streaming':<14} {plain_generated:>11.2f}s {plain_total:>11.2f}s")
+    print(f"{'streaming':<14} {generated:>11.2f}s {total:>11.2f}s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
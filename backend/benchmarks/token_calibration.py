@@ -0,0 +1,47 @@
+"""
+Measures how the local token estimate compares with Anthropic's token counter.
+
+Counts each sample file both ways and prints the TOKEN_CALIBRATION value to
+put in .env, plus the per-file error left after calibration. Needs
+ANTHROPIC_API_KEY. Run from the backend directory:
+    python -m benchmarks.token_calibration FILE [FILE ...]
+"""
+import argparse
+import asyncio
+import time
+from app.core.tokens import TokenEstimator
+from app.services.claude_service import ClaudeService
+
+
+async def count_remote(texts: list[str]) -> list[int]:
+    claude_service = ClaudeService()
+    return [await claude_service.count_tokens(text) for text in texts]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="+", help="Text samples, e.g. file trees, READMEs and source files")
+    args = parser.parse_args()
+
+    estimator = TokenEstimator()
+    texts = []
+    for path in args.files:
+        with open(path, encoding="utf-8", errors="replace") as sample_file:
+            texts.append(sample_file.read())
+    samples = list(zip(args.files, texts, asyncio.run(count_remote(texts))))
+
+    calibration = estimator.calibrate([(text, remote) for _, text, remote in samples])
+    backend = "tiktoken " + estimator.encoding_name if estimator.encoding is not None else "characters / 4"
+    print(f"local estimator: {backend}")
+    print(f"TOKEN_CALIBRATION={calibration:.4f}\n")
+
+    print(f"{'file':<50} {'remote':>8} {'local':>8} {'error':>7} {'ms':>7}")
+    for path, text, remote in samples:
+        start = time.perf_counter()
+        local = estimator.count(text)
+        elapsed = (time.perf_counter() - start) * 1000
+        print(f"{path[-50:]:<50} {remote:>8} {local:>8} {(local - remote) / max(remote, 1):>+7.1%} {elapsed:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Checks the walk over truncated file trees against a fake GitHub tree API.
+
+A generated monorepo is served from memory: recursive listings of trees with
+more than --limit entries come back truncated, like GitHub's do above about
+100k entries. Prints how many files the walk found compared to the full
+tree, how many requests it made and its peak memory.
+
+Runs offline. From the backend directory:
+    python -m benchmarks.tree_walk_check [--files 300000] [--limit 100000]
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+import time
+import tracemalloc
+from app.services.github_service import GitHubService, RepoSnapshot
+
+
+def generate_repository(count: int, seed: int = 0) -> dict:
+    """Nested dicts: directory name -> subtree, file name -> size."""
+    rng = random.Random(seed)
+    roots = ["services", "packages", "libs", "node_modules", "vendor", "docs", "tools"]
+    root: dict = {"README.md": 2000, "package.json": 800}
+    for i in range(count):
+        node = root
+        for part in (rng.choice(roots), f"m{rng.randint(0, 300)}", rng.choice(["src", "lib", "test"])):
+            node = node.setdefault(part, {})
+        node[f"file{i}.{rng.choice(['py', 'ts', 'go', 'md', 'png'])}"] = int(rng.lognormvariate(8, 2))
+    return root
+
+
+class FakeTreeApi:
+    def __init__(self, root: dict, limit: int):
+        self.limit = limit
+        self.trees: dict[str, dict] = {}
+        self.root_sha = self._register(root)
+        self.requests = 0
+
+    def _register(self, node: dict) -> str:
+        sha = hashlib.sha1(str(id(node)).encode()).hexdigest()
+        self.trees[sha] = node
+        return sha
+
+    def _listing(self, node: dict, prefix: str, recursive: bool, out: list):
+        for name, value in sorted(node.items()):
+            if isinstance(value, dict):
+                out.append({"path": prefix + name, "type": "tree", "sha": self._register(value)})
+                if recursive:
+                    self._listing(value, prefix + name + "/", True, out)
+            else:
+                out.append({"path": prefix + name, "type": "blob", "size": value, "sha": "0" * 40})
+
+    async def get_tree(self, snapshot, tree_sha, recursive=False, cache=True):
+        self.requests += 1
+        await asyncio.sleep(0.005)  # network latency
+        entries: list = []
+        self._listing(self.trees[tree_sha], "", recursive, entries)
+        return {"sha": tree_sha, "tree": entries[:self.limit], "truncated": len(entries) > self.limit}
+
+
+def list_files(node: dict, prefix: str = "") -> list[dict]:
+    entries = []
+    for name, value in node.items():
+        if isinstance(value, dict):
+            entries += list_files(value, prefix + name + "/")
+        else:
+            entries.append({"path": prefix + name, "type": "blob", "size": value})
+    return entries
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=300_000)
+    parser.add_argument("--limit", type=int, default=100_000, help="Entries per recursive listing")
+    parser.add_argument("--max-entries", type=int, help="Overrides GITHUB_TREE_MAX_ENTRIES")
+    args = parser.parse_args()
+
+    root = generate_repository(args.files)
+    api = FakeTreeApi(root, args.limit)
+    service = GitHubService()
+    service._get_tree = api.get_tree
+    if args.max_entries:
+        service.tree_max_entries = args.max_entries
+    snapshot = RepoSnapshot("example", "monorepo", "main", api.root_sha)
+
+    expected = service.path_filter.filter_tree(list_files(root))
+    tracemalloc.start()
+    start = time.perf_counter()
+    files = await service.get_file_tree(snapshot)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    missing = {entry["path"] for entry in expected} - {path for path, _ in files}
+    print(f"{len(files)} of {len(expected)} included files listed, {len(missing)} missing")
+    print(f"{api.requests} requests, {elapsed:.1f} s, peak {peak / 1024 / 1024:.0f} MB traced")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
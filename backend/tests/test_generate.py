@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+# The services read their credentials when app.main is imported
+for name in ("AZURE_OPENAI_ENDPOINT", "AZURE_OPENAI_API_KEY", "ANTHROPIC_API_KEY", "CLERK_SECRET_KEY"):
+    os.environ.setdefault(name, "test")
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp())
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers.generate import accepts_gzip, etag_matches
+
+client = TestClient(app)
+
+
+def test_create_generation_job_rejects_long_instructions():
+    response = client.post("/generate/jobs", json={
+        "username": "octocat",
+        "repo": "hello-world",
+        "instructions": "x" * 1001,
+        "audio_length": "short",
+    })
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Instructions exceed maximum length of 1000 characters"}
+
+
+def test_accepts_gzip_honours_q_values():
+    assert accepts_gzip("gzip, deflate, br")
+    assert accepts_gzip("br;q=1.0, gzip;q=0.5")
+    assert accepts_gzip("*")
+    assert not accepts_gzip("gzip;q=0")
+    assert not accepts_gzip("gzip;q=0, *;q=1")
+    assert not accepts_gzip("identity")
+    assert not accepts_gzip("")
+
+
+def test_etag_matches_compares_whole_entries():
+    assert etag_matches('"abc-vtt"', '"abc-vtt"')
+    assert etag_matches('"x", W/"abc-vtt"', '"abc-vtt"')
+    assert etag_matches("*", '"abc-vtt"')
+    assert not etag_matches('"abc-vtt-gzip"', '"abc-vtt"')
+    assert not etag_matches("", '"abc-vtt"')
@@ -0,0 +1,15 @@
+from app.core.path_filter import PathFilter
+
+
+def test_extensionless_files_named_like_excluded_extensions_are_kept():
+    path_filter = PathFilter()
+    paths = ["scripts/log", "bin/a", "tools/db", "src/so", "src/tar", "docs/pdf", "lib/pt", "Makefile"]
+    kept = path_filter.filter_tree([{"path": path, "type": "blob"} for path in paths])
+    assert [entry["path"] for entry in kept] == paths
+
+
+def test_excluded_extensions_are_dropped():
+    path_filter = PathFilter()
+    assert not path_filter.include("logs/server.log")
+    assert not path_filter.include("lib/libfoo.so")
+    assert path_filter.include("src/main.py")
@@ -232,7 +232,15 @@ interface GenerateAudioResponse {
 
       const audioBlob = await response.blob();
       const audioBuffer = await blobToBuffer(audioBlob);
-      const vttContent = response.headers.get("x-vtt-content");
+      // Captions come from their own endpoint, stored base64 encoded like before
+      const captionsUrl = response.headers.get("x-captions-url");
+      let vttContent: string | null = null;
+      if (captionsUrl) {
+        const captionsResponse = await fetch(`${baseUrl}${captionsUrl}`);
+        if (captionsResponse.ok) {
+          vttContent = Buffer.from(await captionsResponse.text(), "utf-8").toString("base64");
+        }
+      }
 
 
       // Call the server action to cache the diagram